@@ -0,0 +1,173 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from constants import TILE_SPEED
+
+
+def linear(t):
+    return t
+
+
+def ease_out_quad(t):
+    return t * (2 - t)
+
+
+def ease_in_out_cubic(t):
+    return 4 * t * t * t if t < 0.5 else 1 - (-2 * t + 2) ** 3 / 2
+
+
+EASINGS = {
+    "linear": linear,
+    "ease_out_quad": ease_out_quad,
+    "ease_in_out_cubic": ease_in_out_cubic,
+}
+
+# Curves that already work element-wise on NumPy arrays
+VECTOR_EASINGS = {
+    "linear": linear,
+    "ease_out_quad": ease_out_quad,
+}
+if numpy is not None:
+    VECTOR_EASINGS["ease_in_out_cubic"] = lambda t: numpy.where(t < 0.5, 4 * t ** 3, 1 - (-2 * t + 2) ** 3 / 2)
+
+# Below this many moving tiles a plain loop beats NumPy's per-call overhead
+NUMPY_MIN_ACTIVE = 16
+
+FIELDS = ("x", "y", "target_x", "target_y", "start_x", "start_y", "elapsed", "duration")
+
+
+class Animator:
+    # Positions, targets and progress for every tile live in packed parallel
+    # arrays indexed by slot. Only slots in `active` are advanced each frame;
+    # a tile that reaches its target goes to sleep until its target changes.
+    def __init__(self, speed=TILE_SPEED, easing="linear", use_numpy=None):
+        self.speed = speed
+        self.easing = easing
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy and numpy is not None
+        self.capacity = 0
+        self.size = 0
+        self.free = []
+        self.active = set()
+        for field in FIELDS:
+            setattr(self, field, self.new_array(0))
+        self.grow(64)
+
+    def new_array(self, capacity):
+        if self.use_numpy:
+            return numpy.zeros(capacity)
+        return array("d", bytes(8 * capacity))
+
+    def grow(self, capacity):
+        for field in FIELDS:
+            old = getattr(self, field)
+            new = self.new_array(capacity)
+            new[:len(old)] = old
+            setattr(self, field, new)
+        self.capacity = capacity
+
+    def allocate(self, x, y):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.size == self.capacity:
+                self.grow(self.capacity * 2)
+            slot = self.size
+            self.size += 1
+        self.x[slot] = self.target_x[slot] = x
+        self.y[slot] = self.target_y[slot] = y
+        return slot
+
+    def release(self, slot):
+        self.active.discard(slot)
+        self.free.append(slot)
+
+    def set_position(self, slot, x, y):
+        self.x[slot] = x
+        self.y[slot] = y
+        self.restart(slot)
+
+    def set_target(self, slot, x, y):
+        if self.target_x[slot] != x or self.target_y[slot] != y:
+            self.target_x[slot] = x
+            self.target_y[slot] = y
+            self.restart(slot)
+
+    def snap(self, slot, x, y):
+        self.x[slot] = self.target_x[slot] = x
+        self.y[slot] = self.target_y[slot] = y
+        self.active.discard(slot)
+
+    def restart(self, slot):
+        dx = self.target_x[slot] - self.x[slot]
+        dy = self.target_y[slot] - self.y[slot]
+        distance = (dx * dx + dy * dy) ** 0.5
+        if distance == 0:
+            self.active.discard(slot)
+            return
+        self.start_x[slot] = self.x[slot]
+        self.start_y[slot] = self.y[slot]
+        self.elapsed[slot] = 0
+        self.duration[slot] = max(distance / self.speed, 1.0)
+        self.active.add(slot)
+
+    def is_moving(self):
+        return bool(self.active)
+
+    def step(self, frames=1):
+        if not self.active:
+            return
+        if self.use_numpy and len(self.active) >= NUMPY_MIN_ACTIVE:
+            self.step_numpy(frames)
+        else:
+            self.step_python(frames)
+
+    def step_python(self, frames):
+        ease = EASINGS[self.easing]
+        settled = []
+        for slot in self.active:
+            elapsed = self.elapsed[slot] + frames
+            duration = self.duration[slot]
+            if elapsed >= duration:
+                self.x[slot] = self.target_x[slot]
+                self.y[slot] = self.target_y[slot]
+                settled.append(slot)
+                continue
+            self.elapsed[slot] = elapsed
+            t = ease(elapsed / duration)
+            self.x[slot] = self.start_x[slot] + (self.target_x[slot] - self.start_x[slot]) * t
+            self.y[slot] = self.start_y[slot] + (self.target_y[slot] - self.start_y[slot]) * t
+        self.active.difference_update(settled)
+
+    def step_numpy(self, frames):
+        slots = numpy.fromiter(self.active, dtype=numpy.intp, count=len(self.active))
+        elapsed = self.elapsed[slots] + frames
+        duration = self.duration[slots]
+        self.elapsed[slots] = elapsed
+        t = numpy.minimum(elapsed / duration, 1.0)
+        if self.easing in VECTOR_EASINGS:
+            t = VECTOR_EASINGS[self.easing](t)
+        else:
+            t = numpy.vectorize(EASINGS[self.easing])(t)
+        start_x = self.start_x[slots]
+        start_y = self.start_y[slots]
+        self.x[slots] = start_x + (self.target_x[slots] - start_x) * t
+        self.y[slots] = start_y + (self.target_y[slots] - start_y) * t
+        done = slots[elapsed >= duration]
+        if len(done):
+            self.x[done] = self.target_x[done]
+            self.y[done] = self.target_y[done]
+            self.active.difference_update(done.tolist())
+
+
+_shared = None
+
+
+def shared_animator():
+    global _shared
+    if _shared is None:
+        _shared = Animator()
+    return _shared
@@ -0,0 +1,70 @@
+import pygame
+
+from constants import *
+
+
+def draw_gradient_background(screen, theme=DEFAULT_THEME):
+    width, height = screen.get_size()
+    top, bottom = theme.bg_top, theme.bg_bottom
+    for y in range(height):
+        color = (
+            top[0] + (bottom[0] - top[0]) * y // height,
+            top[1] + (bottom[1] - top[1]) * y // height,
+            top[2] + (bottom[2] - top[2]) * y // height,
+        )
+        pygame.draw.line(screen, color, (0, y), (width, y))
+
+
+class BackgroundLayer:
+    # Everything that never moves (gradient, dump area, button) is painted
+    # once into an off-screen base surface. View painters (the board grid)
+    # depend on where the board is scrolled to; they are drawn over a copy of
+    # the base only when view_key changes. The result is blitted every frame.
+    def __init__(self, painters, view_painters=()):
+        self.painters = list(painters)
+        self.view_painters = list(view_painters)
+        self.base = None
+        self.surface = None
+        self.key = None
+        self.view_key = None
+        self.profiler = None
+
+    def invalidate(self):
+        self.key = None
+
+    def new_surface(self, size):
+        return pygame.Surface(size).convert() if pygame.display.get_surface() else pygame.Surface(size)
+
+    def rebuild(self, size, theme):
+        base = self.new_surface(size)
+        for painter in self.painters:
+            painter(base, theme)
+        self.base = base
+        self.surface = self.new_surface(size) if self.view_painters else base
+        self.key = (size, theme)
+
+    def compose(self, theme, view_key):
+        if self.view_painters:
+            self.surface.blit(self.base, (0, 0))
+            for painter in self.view_painters:
+                painter(self.surface, theme)
+        self.view_key = view_key
+
+    def ensure(self, screen, theme=DEFAULT_THEME, view_key=None):
+        size = screen.get_size()
+        rebuilt = False
+        if self.key != (size, theme):
+            self.rebuild(size, theme)
+            rebuilt = True
+            if self.profiler is not None:
+                self.profiler.mark("background")
+        if rebuilt or self.view_key != view_key:
+            self.compose(theme, view_key)
+            rebuilt = True
+            if self.profiler is not None:
+                self.profiler.mark("grid")
+        return rebuilt
+
+    def draw(self, screen, theme=DEFAULT_THEME, view_key=None):
+        self.ensure(screen, theme, view_key)
+        screen.blit(self.surface, (0, 0))
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from constants import *
+from background import BackgroundLayer, draw_gradient_background
+from sprites import get_tile_atlas
+from engine import Board
+from main import GameBoard, DumpArea, ResetButton
+from viewport import Viewport
+
+
+def time_frames(draw, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def main(frames=200):
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    board = GameBoard(screen, get_tile_atlas(), Board(), Viewport((0, 0, GRID_WIDTH * TILE_SIZE, GRID_HEIGHT * TILE_SIZE)))
+    dump_area = DumpArea(screen)
+    reset_button = ResetButton(screen)
+
+    def repaint():
+        screen.fill(BG_COLOR)
+        draw_gradient_background(screen)
+        board.draw_grid(screen)
+        dump_area.draw(screen)
+        reset_button.draw(screen)
+
+    background = BackgroundLayer([draw_gradient_background, dump_area.draw, reset_button.draw], [board.draw_grid])
+    background.draw(screen)  # build the cache outside the timed loop
+
+    before = time_frames(repaint, frames)
+    after = time_frames(lambda: background.draw(screen), frames)
+    print(f"full repaint:     {before:8.3f} ms/frame")
+    print(f"cached layer:     {after:8.3f} ms/frame")
+    print(f"speedup:          {before / after:8.1f}x")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
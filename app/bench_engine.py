@@ -0,0 +1,41 @@
+import random
+import sys
+import time
+
+from constants import GRID_WIDTH, GRID_HEIGHT
+from engine import Game
+
+
+def scripted_turn(game, rng):
+    roll = rng.random()
+    if roll < 0.5 and game.rack.letters:
+        game.play(rng.randrange(len(game.rack)), rng.randrange(GRID_HEIGHT), rng.randrange(GRID_WIDTH))
+    elif roll < 0.8:
+        game.move(rng.randrange(GRID_HEIGHT), rng.randrange(GRID_WIDTH),
+                  rng.randrange(GRID_HEIGHT), rng.randrange(GRID_WIDTH))
+    elif roll < 0.95 and game.rack.letters:
+        game.dump_from_rack(rng.randrange(len(game.rack)))
+    else:
+        game.reset()
+
+
+def run(turns, seed, history):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for turn in range(turns):
+        if turn % 500 == 0:
+            game = Game(seed + turn, history=history)
+        scripted_turn(game, rng)
+    elapsed = time.perf_counter() - start
+    label = "with undo history" if history else "without history"
+    print(f"{turns} turns in {elapsed:.2f}s ({turns / elapsed:,.0f} turns/s) {label}")
+
+
+def main(turns=200000, seed=0):
+    run(turns, seed, history=True)
+    run(turns, seed, history=False)
+    print(f"pygame imported: {'pygame' in sys.modules}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from constants import *
+from background import BackgroundLayer, draw_gradient_background
+from sprites import get_tile_atlas
+from renderer import DirtyRenderer
+from engine import Game
+from animation import Animator
+from viewport import Viewport
+from main import PlayerBar, GameBoard, DumpArea, ResetButton, PoolCounter
+from util import percentile
+
+# Share of the visible GRID_WIDTH x GRID_HEIGHT board covered by tiles
+FILL_LEVELS = {"empty": 0.0, "half": 0.5, "full": 1.0}
+DEFAULT_THRESHOLD = 0.10  # allowed p50 slowdown before a case counts as a regression
+
+
+class Scene:
+    # Everything main() builds, wired the same way, with the board filled to
+    # the requested level
+    def __init__(self, screen, fill, seed=0):
+        rng = random.Random(seed)
+        self.screen = screen
+        self.game = Game(seed)
+        self.atlas = get_tile_atlas()
+        self.animator = Animator()
+        self.player_bar = PlayerBar(screen, self.atlas, self.animator)
+        self.viewport = Viewport((0, 0, GRID_WIDTH * TILE_SIZE, GRID_HEIGHT * TILE_SIZE))
+        self.board = GameBoard(screen, self.atlas, self.game.board, self.viewport)
+        self.counter = PoolCounter(self.game.pool)
+        self.dump_area = DumpArea(screen)
+        self.reset_button = ResetButton(screen)
+        self.background = BackgroundLayer([draw_gradient_background, self.dump_area.draw, self.reset_button.draw],
+                                          [self.board.draw_grid])
+        self.renderer = DirtyRenderer(screen, self.background)
+        self.board.renderer = self.player_bar.renderer = self.renderer
+        self.player_bar.add_tiles(self.game.rack.letters)
+
+        # Benchmarks want a full grid, which is more than one pool holds, so
+        # filler tiles go straight onto the board
+        cells = [(row, col) for row in range(GRID_HEIGHT) for col in range(GRID_WIDTH)]
+        rng.shuffle(cells)
+        letters = list(LETTER_DISTRIBUTION)
+        for row, col in cells[:round(len(cells) * fill)]:
+            letter = rng.choice(letters)
+            self.game.board.place(row, col, letter)
+            self.board.place_tile(row, col, self.player_bar_tile(letter))
+
+    def player_bar_tile(self, letter):
+        self.player_bar.add_tiles([letter])
+        return self.player_bar.tiles.pop()
+
+    def scatter_rack(self):
+        # Send every rack tile on a fresh trip so the animation pass has work
+        for tile in self.player_bar.tiles:
+            tile.snap_to(0, 0)
+        self.player_bar.layout()
+
+    def frame(self):
+        # What main() does after the animation step: the views push what
+        # changed and the renderer repaints it
+        self.board.refresh()
+        self.player_bar.refresh()
+        self.renderer.set(*self.counter.counter_sprite())
+        self.renderer.render(DEFAULT_THEME, self.viewport.key)
+
+
+def phases(scene):
+    screen = scene.screen
+    return {
+        "draw_gradient_background": lambda: draw_gradient_background(screen),
+        "GameBoard.draw_grid": lambda: scene.board.draw_grid(screen),
+        "GameBoard.draw_tiles": scene.board.draw_tiles,
+        "PlayerBar.draw": scene.player_bar.draw,
+        "DumpArea.draw+ResetButton.draw": lambda: (scene.dump_area.draw(screen), scene.reset_button.draw(screen)),
+        "animation": animation_pass(scene),
+        "input (click + drag to rack)": input_pass(scene),
+        "frame (idle)": scene.frame,
+        "frame (rack moving)": moving_frame(scene),
+    }
+
+
+def animation_pass(scene):
+    def run():
+        if not scene.animator.is_moving():
+            scene.scatter_rack()
+        scene.animator.step()
+    return run
+
+
+def input_pass(scene):
+    # The mouse-button handlers' work: hit-test a batch of clicks across the
+    # window, then pick a rack tile up and drop it back
+    rng = random.Random(1)
+    clicks = [(rng.randrange(WINDOW_WIDTH), rng.randrange(WINDOW_HEIGHT)) for _ in range(32)]
+
+    def run():
+        for x, y in clicks:
+            if not scene.reset_button.is_clicked((x, y)) and not scene.dump_area.is_in_area((x, y)):
+                scene.player_bar.get_tile_at_position(x, y)
+                scene.viewport.cell_at(x, y)
+        if scene.game.pick_from_rack(0) is not None:
+            tile = scene.player_bar.remove_tile(0)
+            scene.game.drop_on_rack()
+            scene.player_bar.add_tiles([tile])
+    return run
+
+
+def moving_frame(scene):
+    def run():
+        if not scene.animator.is_moving():
+            scene.scatter_rack()
+        scene.animator.step()
+        scene.frame()
+    return run
+
+
+def measure(func, frames, warmup=5):
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {"p50_ms": percentile(times, 0.5), "p99_ms": percentile(times, 0.99), "frames": frames}
+
+
+def run(frames):
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    results = {}
+    for level, fill in FILL_LEVELS.items():
+        scene = Scene(screen, fill)
+        for name, func in phases(scene).items():
+            results[f"{level}/{name}"] = measure(func, frames)
+    pygame.quit()
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for case, result in results.items():
+        before = baseline.get(case)
+        if before is None or not before["p50_ms"]:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(case)
+        print(f"{case:52} {before['p50_ms']:9.3f} -> {result['p50_ms']:9.3f} ms  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless frame-time benchmarks for the game loop.")
+    parser.add_argument("--frames", type=int, default=200, help="timed iterations per case")
+    parser.add_argument("--save", help="write results to this JSON file (a new baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fractional p50 slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    results = run(args.frames)
+    print(f"{'case':52} {'p50 ms':>9} {'p99 ms':>9}")
+    for case, result in results.items():
+        print(f"{case:52} {result['p50_ms']:9.3f} {result['p99_ms']:9.3f}")
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
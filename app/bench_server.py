@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from constants import GRID_WIDTH, GRID_HEIGHT, SERVER_HOST, SERVER_PORT
+from util import APP_DIR, percentile
+
+# Load generator for server.py. Every connection opens its own sessions and
+# plays random turns on them round-robin, keeping `pipeline` requests in
+# flight, until the time is up; latency is measured per request from send to
+# reply.
+
+
+def random_request(session, rack, rng):
+    roll = rng.random()
+    if not rack:
+        return {"op": "draw", "session": session}
+    if roll < 0.5:
+        return {"op": "place", "session": session, "index": rng.randrange(rack),
+                "row": rng.randrange(GRID_HEIGHT), "col": rng.randrange(GRID_WIDTH)}
+    if roll < 0.7:
+        return {"op": "move", "session": session, "row": rng.randrange(GRID_HEIGHT),
+                "col": rng.randrange(GRID_WIDTH), "to_row": rng.randrange(GRID_HEIGHT),
+                "to_col": rng.randrange(GRID_WIDTH)}
+    if roll < 0.85:
+        return {"op": "remove", "session": session, "row": rng.randrange(GRID_HEIGHT),
+                "col": rng.randrange(GRID_WIDTH)}
+    if roll < 0.97:
+        return {"op": "dump", "session": session, "index": rng.randrange(rack)}
+    return {"op": "reset", "session": session}
+
+
+async def connect(host, port, unix):
+    if unix:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, port)
+
+
+async def call(reader, writer, request):
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def client(args, number, deadline, latencies, errors):
+    rng = random.Random(args.seed + number)
+    reader, writer = await connect(args.host, args.port, args.unix)
+    racks = {}
+    for i in range(args.sessions):
+        reply = await call(reader, writer, {"op": "new", "seed": args.seed + number * args.sessions + i})
+        racks[reply["result"]["session"]] = len(reply["rack"])
+    sessions = list(racks)
+    turn = 0
+    while time.perf_counter() < deadline:
+        batch = []
+        for _ in range(args.pipeline):
+            session = sessions[turn % len(sessions)]
+            turn += 1
+            batch.append((session, time.perf_counter()))
+            writer.write(json.dumps(random_request(session, racks[session], rng)).encode() + b"\n")
+        await writer.drain()
+        for session, sent in batch:
+            reply = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent)
+            if reply["ok"]:
+                racks[session] = len(reply["rack"])
+            else:
+                errors.append(reply["error"])
+    if args.close:
+        for session in sessions:
+            await call(reader, writer, {"op": "close", "session": session})
+    writer.close()
+
+
+async def run(args):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    await asyncio.gather(*(client(args, number, deadline, latencies, errors) for number in range(args.connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{args.connections} connections x {args.sessions} sessions, pipeline {args.pipeline}: "
+          f"{len(latencies)} requests in {elapsed:.1f}s ({len(latencies) / elapsed:,.0f} requests/s), "
+          f"{len(errors)} errors")
+    print("latency ms  " + "  ".join(f"p{int(fraction * 100)} {percentile(latencies, fraction) * 1000:.2f}"
+                                     for fraction in (0.5, 0.9, 0.99)) +
+          f"  max {latencies[-1] * 1000 if latencies else 0.0:.2f}")
+
+
+def spawn(args, directory):
+    # Starts server.py on its own port and session directory and waits for
+    # it to accept connections
+    command = [sys.executable, os.path.join(APP_DIR, "server.py"),
+               "--host", args.host, "--port", str(args.port), "--session-dir", directory]
+    if args.unix:
+        command += ["--unix", args.unix]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    server.stdout.readline()  # "serving sessions on ..."
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive server.py with concurrent random games.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--unix", help="connect to this Unix socket instead of TCP")
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=20, help="games per connection")
+    parser.add_argument("--pipeline", type=int, default=1, help="requests in flight per connection")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--close", action="store_true", help="close every session at the end")
+    parser.add_argument("--spawn", action="store_true", help="start a server for the run and stop it after")
+    args = parser.parse_args()
+
+    if not args.spawn:
+        asyncio.run(run(args))
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        server = spawn(args, directory)
+        try:
+            asyncio.run(run(args))
+        finally:
+            server.terminate()
+            print(server.communicate()[0].strip())
+
+
+if __name__ == "__main__":
+    main()
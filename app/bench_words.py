@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from words import word_list_path, read_word_list, compiled_path
+from dawg import compile_words
+from util import APP_DIR
+
+# Each loader runs in a fresh interpreter so startup time and resident memory
+# are measured the way a player launching the game would see them.
+CHILD = """
+import json, os, sys, time
+sys.path.insert(0, {app!r})
+
+def private_kb():
+    # Resident pages not backed by a shared file mapping (Linux)
+    with open("/proc/self/statm") as f:
+        _, resident, shared = map(int, f.read().split()[:3])
+    return (resident - shared) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+before = private_kb()
+start = time.perf_counter()
+from words import WordIndex, read_word_list
+from dawg import Dawg
+words = Dawg.load({path!r}) if {compiled!r} else WordIndex(read_word_list({path!r}))
+loaded = time.perf_counter() - start
+probes = {probes!r}
+start = time.perf_counter()
+hits = sum(word in words for word in probes)
+lookup = time.perf_counter() - start
+print(json.dumps({{"load_ms": loaded * 1000, "lookup_us": lookup * 1e6 / len(probes),
+                  "private_kb": private_kb() - before, "hits": hits}}))
+"""
+
+
+def measure(path, compiled, probes):
+    code = CHILD.format(app=APP_DIR, path=path, compiled=compiled, probes=probes)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare startup of the plain-text and compiled word lists.")
+    parser.add_argument("words", nargs="?", help="word list to test (defaults to the game's)")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per format; the best run is kept")
+    args = parser.parse_args()
+
+    path = word_list_path(args.words)
+    if not os.path.exists(path):
+        sys.exit(f"no word list at {path}")
+    words = read_word_list(path)
+    probes = words[::max(1, len(words) // 500)] + [word[::-1] + "Q" for word in words[:500]]
+    with tempfile.TemporaryDirectory() as directory:
+        compiled = os.path.join(directory, os.path.basename(compiled_path(path)))
+        size = compile_words(words, compiled)
+        print(f"{len(words)} words: text {os.path.getsize(path):,} bytes, compiled {size:,} bytes")
+        for label, target, is_compiled in (("text", path, False), ("compiled", compiled, True)):
+            runs = [measure(target, is_compiled, probes) for _ in range(args.runs)]
+            best = min(runs, key=lambda run: run["load_ms"])
+            print(f"{label:9} load {best['load_ms']:8.1f} ms  lookup {best['lookup_us']:6.2f} us  "
+                  f"+{best['private_kb'] / 1024:6.1f} MiB private memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from collections import namedtuple
+
+# Constants
+TILE_SIZE = 50
+GRID_WIDTH = 16
+GRID_HEIGHT = 16
+SIDE_PANEL_WIDTH = 150
+BOTTOM_BAR_HEIGHT = TILE_SIZE * 2
+DUMP_AREA_HEIGHT = TILE_SIZE
+BUTTON_HEIGHT = 50
+WINDOW_WIDTH = GRID_WIDTH * TILE_SIZE + SIDE_PANEL_WIDTH
+WINDOW_HEIGHT = GRID_HEIGHT * TILE_SIZE + BOTTOM_BAR_HEIGHT + DUMP_AREA_HEIGHT + BUTTON_HEIGHT
+FONT_SIZE = 36
+STATUS_FONT_SIZE = 24  # board status line under the tile counter
+BG_COLOR = (255, 255, 255)
+TILE_COLOR = (200, 200, 200)
+DUMP_COLOR = (220, 120, 120)
+BUTTON_COLOR = (100, 200, 100)
+BUTTON_TEXT_COLOR = (255, 255, 255)
+TEXT_COLOR = (0, 0, 0)
+GRID_COLOR = (0, 0, 0)
+POOL_TEXT_COLOR = (50, 50, 50)
+BG_COLOR_TOP = (234, 163, 255)
+BG_COLOR_BOTTOM = (41, 71, 102)
+TILE_SHADOW_COLOR = (98, 131, 166)
+TILE_BORDER_COLOR = (15, 36, 59)
+TILE_HIGHLIGHT_COLOR = (255, 236, 150)
+TILE_INVALID_COLOR = (240, 150, 150)
+TILE_SHADOW_OFFSET = 4
+TILE_BORDER_RADIUS = 8
+TILE_SPEED = 30  # pixels per frame at ANIMATION_BASE_FPS
+TEXT_CACHE_SIZE = 256  # rendered labels kept by the resource cache
+
+# Frame pacing: full rate while something moves, block on input otherwise
+ACTIVE_FPS = 60
+IDLE_TIMEOUT_MS = 1000
+ANIMATION_BASE_FPS = 30
+
+LETTER_DISTRIBUTION = {
+    "A": 13, "B": 3, "C": 3, "D": 6, "E": 18, "F": 3,
+    "G": 4, "H": 3, "I": 12, "J": 2, "K": 2, "L": 5,
+    "M": 3, "N": 8, "O": 11, "P": 3, "Q": 2, "R": 9,
+    "S": 6, "T": 9, "U": 6, "V": 3, "W": 3, "X": 2,
+    "Y": 3, "Z": 2
+}
+
+# One word per line; BANANA_WORDS overrides the default location next to the game
+WORD_LIST_PATH = "words.txt"
+MIN_WORD_LENGTH = 2
+# Every game is recorded here; BANANA_LOG_DIR overrides, an empty value turns logging off
+LOG_DIR = "logs"
+SOLVER_TIME_BUDGET = 0.5  # seconds the H key may spend searching
+# Background jobs (hints, board status, dump advice) run in a worker process
+# so they never hold the GIL the game loop draws with; the worker loads its
+# own word list. A thread pool saves that memory but costs frame time.
+JOB_WORKERS = 1
+JOB_PROCESSES = True
+# Dump advice in the side panel
+VOWELS = "AEIOU"
+VOWEL_TARGET = 0.4  # below this share of vowels on the rack, vowels count as useful draws
+NEEDED_LETTERS = 4  # letters completing the most board words count as useful draws
+ODDS_CACHE_SIZE = 64  # pool states whose odds tables are kept
+# Session server: idle sessions are written to SESSION_DIR (BANANA_SESSION_DIR
+# overrides) and dropped from memory until their next request
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SESSION_DIR = "sessions"
+SESSION_IDLE_SECONDS = 300
+SESSION_SWEEP_SECONDS = 10
+SESSION_MAX_RACK = 144  # the most tiles one letter set holds
+SESSION_MAX_SETS = 8
+# Profiling: F3 toggles the HUD, F4 captures PROFILE_FRAMES frames with cProfile
+# into PROFILE_DIR (BANANA_PROFILE_DIR overrides). Setting BANANA_METRICS to a
+# file path exports the counters there every METRICS_INTERVAL seconds.
+HUD_FONT_SIZE = 20
+HUD_REFRESH_MS = 250
+PROFILE_FRAMES = 300
+PROFILE_DIR = "profiles"
+METRICS_INTERVAL = 5
+
+# Colours baked into the cached background layer; changing any of them
+# triggers a rebuild of that layer.
+Theme = namedtuple("Theme", "bg_top bg_bottom grid dump button button_text text")
+DEFAULT_THEME = Theme(BG_COLOR_TOP, BG_COLOR_BOTTOM, GRID_COLOR, DUMP_COLOR, BUTTON_COLOR, BUTTON_TEXT_COLOR, TEXT_COLOR)
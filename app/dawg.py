@@ -0,0 +1,235 @@
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+
+# Compiled word list: a minimal acyclic automaton (DAWG) stored as a flat
+# array of u32 edges, memory-mapped read-only so startup does no parsing and
+# every process using the file shares it through the page cache.
+#
+# Header: MAGIC, version (u8), three pad bytes, word count (u32), edge count
+# (u32), root (u32). Each state is a run of edges sorted by letter; an edge is
+# letter byte | FINAL (the word ending on this edge is valid) | LAST (last
+# edge of its state) | target state << TARGET_SHIFT. Target 0 means no
+# outgoing edges, which is why edge 0 is a dummy and the root starts at 1.
+
+MAGIC = b"BNDG"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xIII")
+LETTER_MASK = 0xFF
+FINAL = 1 << 8
+LAST = 1 << 9
+TARGET_SHIFT = 10
+MAX_EDGES = 1 << (32 - TARGET_SHIFT)
+WILDCARD = "?"
+
+
+class BuildNode:
+    __slots__ = ("final", "edges")
+
+    def __init__(self):
+        self.final = False
+        self.edges = {}  # letter -> BuildNode, in insertion (sorted) order
+
+    def signature(self):
+        # Children are already canonical when this is asked, so their
+        # identities stand in for their whole subtrees
+        return self.final, tuple((letter, id(child)) for letter, child in self.edges.items())
+
+
+def build(words):
+    # Daciuk et al.'s incremental construction: words arrive sorted, and the
+    # branch left behind by the previous word is minimised against a
+    # register of canonical states before the next word is added.
+    root = BuildNode()
+    register = {}
+    unchecked = []  # (parent, letter, child) along the last word's path
+    previous = ""
+    count = 0
+
+    def minimise(down_to):
+        while len(unchecked) > down_to:
+            parent, letter, child = unchecked.pop()
+            key = child.signature()
+            canonical = register.get(key)
+            if canonical is None:
+                register[key] = child
+            else:
+                parent.edges[letter] = canonical
+
+    for word in sorted(set(words)):
+        common = 0
+        for a, b in zip(word, previous):
+            if a != b:
+                break
+            common += 1
+        minimise(common)
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common:]:
+            child = BuildNode()
+            node.edges[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.final = True
+        previous = word
+        count += 1
+    minimise(0)
+    return root, count
+
+
+def encode(root, count):
+    # Lays every distinct state out as a run of edges, breadth first
+    offsets = {id(root): 1}
+    order = [root]
+    size = 1 + len(root.edges)
+    for node in order:
+        for child in node.edges.values():
+            if child.edges and id(child) not in offsets:
+                offsets[id(child)] = size
+                size += len(child.edges)
+                order.append(child)
+    if size >= MAX_EDGES:
+        raise ValueError(f"word list too large for the edge format ({size} edges)")
+    edges = array("I", [0])
+    for node in order:
+        items = list(node.edges.items())
+        for i, (letter, child) in enumerate(items):
+            edge = ord(letter) | (offsets[id(child)] << TARGET_SHIFT if child.edges else 0)
+            if child.final:
+                edge |= FINAL
+            if i == len(items) - 1:
+                edge |= LAST
+            edges.append(edge)
+    if sys.byteorder != "little":
+        edges.byteswap()
+    return HEADER.pack(MAGIC, VERSION, count, len(edges), 1 if root.edges else 0) + edges.tobytes()
+
+
+def compile_words(words, path):
+    words = [word for word in words if word.isascii()]
+    data = encode(*build(words))
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+class Dawg:
+    # Read-only view of a compiled word list; supports the same membership,
+    # len and iteration as words.WordIndex plus prefix and pattern queries,
+    # all walking the mapped edges without unpacking them.
+    def __init__(self, data):
+        magic, version, count, edge_count, root = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a compiled word list, or written by an unsupported version")
+        view = memoryview(data)[HEADER.size:HEADER.size + edge_count * 4]
+        if sys.byteorder == "little":
+            self.edges = view.cast("I")
+        else:
+            # Big-endian hosts pay for a private, swapped copy
+            self.edges = array("I", view.tobytes())
+            self.edges.byteswap()
+        self.count = count
+        self.root = root
+        self.data = data
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return self.count
+
+    def edge(self, state, letter):
+        # Index of the edge leaving state on letter, or None
+        edges = self.edges
+        code = ord(letter)
+        i = state
+        while i:
+            edge = edges[i]
+            if edge & LETTER_MASK == code:
+                return i
+            if edge & LAST:
+                return None
+            i += 1
+        return None
+
+    def walk(self, string):
+        # The edge reached by spelling string from the root, or None
+        state, edge = self.root, None
+        for letter in string:
+            edge = self.edge(state, letter)
+            if edge is None:
+                return None
+            state = self.edges[edge] >> TARGET_SHIFT
+        return edge
+
+    def __contains__(self, word):
+        if not word:
+            return False
+        edge = self.walk(word)
+        return edge is not None and bool(self.edges[edge] & FINAL)
+
+    def has_prefix(self, prefix):
+        return not prefix or self.walk(prefix) is not None
+
+    def match(self, pattern):
+        # Words of exactly len(pattern) letters; WILDCARD matches any letter
+        if not pattern:
+            return []
+        found = []
+        edges = self.edges
+        stack = [(self.root, "")]
+        while stack:
+            state, spelled = stack.pop()
+            want = pattern[len(spelled)]
+            last = len(spelled) + 1 == len(pattern)
+            i = state
+            while i:
+                edge = edges[i]
+                letter = chr(edge & LETTER_MASK)
+                if want == WILDCARD or letter == want:
+                    if last:
+                        if edge & FINAL:
+                            found.append(spelled + letter)
+                    elif edge >> TARGET_SHIFT:
+                        stack.append((edge >> TARGET_SHIFT, spelled + letter))
+                if edge & LAST:
+                    break
+                i += 1
+        found.sort()
+        return found
+
+    def __iter__(self):
+        # Every word, in sorted order
+        edges = self.edges
+        stack = [(self.root, "")]
+        while stack:
+            i, spelled = stack.pop()
+            if not i:
+                continue
+            edge = edges[i]
+            word = spelled + chr(edge & LETTER_MASK)
+            if not edge & LAST:
+                stack.append((i + 1, spelled))
+            stack.append((edge >> TARGET_SHIFT, word))
+            if edge & FINAL:
+                yield word
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a word list into a memory-mappable DAWG.")
+    parser.add_argument("words", help="text file with one word per line")
+    parser.add_argument("output", nargs="?", help="defaults to the word list's name with a .dawg extension")
+    args = parser.parse_args()
+
+    from words import read_word_list, compiled_path
+    output = args.output or compiled_path(args.words)
+    words = read_word_list(args.words)
+    size = compile_words(words, output)
+    print(f"{len(set(words))} words -> {output} ({size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
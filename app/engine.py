@@ -0,0 +1,577 @@
+import random
+from collections import namedtuple
+
+from constants import LETTER_DISTRIBUTION
+from eventlog import PICK_RACK, PICK_BOARD, DROP_BOARD, DROP_RACK, DUMP, RESET, UNDO, REDO, PEEL
+
+# Pure game state and rules. Nothing in here may import pygame, so the engine
+# can be driven headless by scripts, simulations and benchmarks.
+
+OPENING_RACK_SIZE = 21
+DUMP_DRAW_COUNT = 3
+CHUNK_SHIFT = 4
+CHUNK_SIZE = 1 << CHUNK_SHIFT
+CHUNK_MASK = CHUNK_SIZE - 1
+
+BoardSnapshot = namedtuple("BoardSnapshot", "chunks count")
+GameSnapshot = namedtuple("GameSnapshot", "board rack pool")
+
+
+class TilePool:
+    # The pool is a multiset: one count per letter plus a Fenwick tree over
+    # those counts, so a uniformly random tile is found in O(log 26) without
+    # ever shuffling a list of tiles.
+    __slots__ = ("rng", "letters", "index", "counts", "saved", "tree", "total", "step")
+
+    def __init__(self, distribution=LETTER_DISTRIBUTION, rng=None, sets=1):
+        self.rng = rng if rng is not None else random.Random()
+        self.letters = sorted(distribution)
+        self.index = {letter: i for i, letter in enumerate(self.letters)}
+        self.counts = [distribution[letter] * sets for letter in self.letters]
+        self.saved = None  # the last snapshot, until the pool next changes
+        self.rebuild()
+
+    def rebuild(self):
+        size = len(self.counts)
+        self.tree = [0] * (size + 1)
+        for i, count in enumerate(self.counts):
+            self.add(i, count)
+        self.total = sum(self.counts)
+        self.step = 1 << (size.bit_length() - 1) if size else 0
+
+    def add(self, i, delta):
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, k):
+        # Index of the letter holding the k-th remaining tile (0-based)
+        pos = 0
+        step = self.step
+        while step:
+            nxt = pos + step
+            if nxt < len(self.tree) and self.tree[nxt] <= k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return pos
+
+    def __len__(self):
+        return self.total
+
+    def remaining(self, letter):
+        i = self.index.get(letter)
+        return self.counts[i] if i is not None else 0
+
+    def remaining_counts(self):
+        return dict(zip(self.letters, self.counts))
+
+    def draw_tile(self):
+        if not self.total:
+            return None
+        i = self.find(self.rng.randrange(self.total))
+        self.saved = None
+        self.counts[i] -= 1
+        self.total -= 1
+        self.add(i, -1)
+        return self.letters[i]
+
+    def return_tile(self, letter):
+        i = self.index[letter]
+        self.saved = None
+        self.counts[i] += 1
+        self.total += 1
+        self.add(i, 1)
+
+    def dump_tiles(self, letter):
+        if self.total >= DUMP_DRAW_COUNT:
+            self.return_tile(letter)
+            return [self.draw_tile() for _ in range(DUMP_DRAW_COUNT)]
+        return []
+
+    def snapshot(self):
+        # The pool only changes on a dump, so most snapshots share one tuple
+        if self.saved is None:
+            self.saved = (tuple(self.counts), self.rng.getstate())
+        return self.saved
+
+    def restore(self, snapshot):
+        counts, rng_state = snapshot
+        self.counts = list(counts)
+        self.rng.setstate(rng_state)
+        self.saved = snapshot
+        self.rebuild()
+
+
+class Rack:
+    __slots__ = ("letters",)
+
+    def __init__(self):
+        self.letters = []
+
+    def __len__(self):
+        return len(self.letters)
+
+    def add(self, letters):
+        self.letters.extend(letters)
+
+    def remove(self, index):
+        if 0 <= index < len(self.letters):
+            return self.letters.pop(index)
+        return None
+
+
+class Chunk:
+    # A CHUNK_SIZE x CHUNK_SIZE block of cells: letters in a flat bytearray
+    # (0 = empty) plus one occupancy bitmask per row.
+    __slots__ = ("cells", "row_masks", "count")
+
+    def __init__(self):
+        self.cells = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        self.row_masks = [0] * CHUNK_SIZE
+        self.count = 0
+
+    def copy(self):
+        chunk = Chunk.__new__(Chunk)
+        chunk.cells = self.cells[:]
+        chunk.row_masks = self.row_masks[:]
+        chunk.count = self.count
+        return chunk
+
+    def cells_at(self, key):
+        chunk_row, chunk_col = key
+        base_row, base_col = chunk_row << CHUNK_SHIFT, chunk_col << CHUNK_SHIFT
+        for r, mask in enumerate(self.row_masks):
+            while mask:
+                low = mask & -mask
+                yield base_row + r, base_col + low.bit_length() - 1
+                mask ^= low
+
+
+class Board:
+    # An unbounded board stored as a sparse map of fixed-size chunks. Only
+    # chunks holding tiles exist, so memory and every query below scale with
+    # the tiles placed rather than the extent of the layout.
+    #
+    # Chunks are copy-on-write: snapshot() hands out the current chunk map
+    # and marks it shared, and the next write copies the map and only the
+    # chunk it touches. A snapshot is O(1) and history costs one chunk per
+    # change.
+    __slots__ = ("chunks", "shared", "owned", "count", "listeners")
+
+    def __init__(self):
+        self.chunks = {}  # (chunk_row, chunk_col) -> Chunk
+        self.shared = False  # self.chunks is also held by a snapshot
+        self.owned = set()  # chunks created or copied since the last snapshot
+        self.count = 0
+        self.listeners = []  # called with (row, col) after a cell changes
+
+    def __len__(self):
+        return self.count
+
+    def get(self, row, col):
+        chunk = self.chunks.get((row >> CHUNK_SHIFT, col >> CHUNK_SHIFT))
+        if chunk is not None:
+            value = chunk.cells[(row & CHUNK_MASK) * CHUNK_SIZE + (col & CHUNK_MASK)]
+            if value:
+                return chr(value)
+        return None
+
+    def writable(self, key):
+        # The chunk at key, safe to modify in place
+        if self.shared:
+            self.chunks = dict(self.chunks)
+            self.shared = False
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = Chunk()
+            self.owned.add(key)
+        elif key not in self.owned:
+            chunk = self.chunks[key] = chunk.copy()
+            self.owned.add(key)
+        return chunk
+
+    def place(self, row, col, letter):
+        key = (row >> CHUNK_SHIFT, col >> CHUNK_SHIFT)
+        r, c = row & CHUNK_MASK, col & CHUNK_MASK
+        chunk = self.chunks.get(key)
+        if chunk is not None and chunk.cells[r * CHUNK_SIZE + c]:
+            return False
+        chunk = self.writable(key)
+        chunk.cells[r * CHUNK_SIZE + c] = ord(letter)
+        chunk.row_masks[r] |= 1 << c
+        chunk.count += 1
+        self.count += 1
+        self.changed(row, col)
+        return True
+
+    def remove(self, row, col):
+        key = (row >> CHUNK_SHIFT, col >> CHUNK_SHIFT)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            return None
+        r, c = row & CHUNK_MASK, col & CHUNK_MASK
+        value = chunk.cells[r * CHUNK_SIZE + c]
+        if not value:
+            return None
+        chunk = self.writable(key)
+        chunk.cells[r * CHUNK_SIZE + c] = 0
+        chunk.row_masks[r] &= ~(1 << c)
+        chunk.count -= 1
+        if not chunk.count:
+            del self.chunks[key]
+            self.owned.discard(key)
+        self.count -= 1
+        self.changed(row, col)
+        return chr(value)
+
+    def snapshot(self):
+        if not self.shared:
+            self.shared = True
+            self.owned = set()
+        return BoardSnapshot(self.chunks, self.count)
+
+    def restore(self, snapshot):
+        old = self.chunks
+        self.chunks = snapshot.chunks
+        self.count = snapshot.count
+        self.shared = True
+        self.owned = set()
+        if self.listeners:
+            # Only chunks that are not the very same object can differ
+            for key in old.keys() | self.chunks.keys():
+                before, after = old.get(key), self.chunks.get(key)
+                if before is after:
+                    continue
+                cells = set()
+                for chunk in (before, after):
+                    if chunk is not None:
+                        cells.update(chunk.cells_at(key))
+                for row, col in sorted(cells):
+                    i = (row & CHUNK_MASK) * CHUNK_SIZE + (col & CHUNK_MASK)
+                    if (before.cells[i] if before else 0) != (after.cells[i] if after else 0):
+                        self.changed(row, col)
+
+    def clear(self):
+        return [self.remove(row, col) for row, col in self.occupied_cells()]
+
+    def changed(self, row, col):
+        for listener in self.listeners:
+            listener(row, col)
+
+    def cells(self):
+        # Occupied cells in no particular order
+        for key, chunk in self.chunks.items():
+            yield from chunk.cells_at(key)
+
+    def occupied_cells(self):
+        # Row-major, matching the order a full scan of the grid would give
+        return sorted(self.cells())
+
+    def cells_in(self, top, left, bottom, right):
+        # Occupied cells with top <= row < bottom and left <= col < right,
+        # touching only the chunks that overlap that window
+        cells = []
+        for chunk_row in range(top >> CHUNK_SHIFT, ((bottom - 1) >> CHUNK_SHIFT) + 1):
+            for chunk_col in range(left >> CHUNK_SHIFT, ((right - 1) >> CHUNK_SHIFT) + 1):
+                chunk = self.chunks.get((chunk_row, chunk_col))
+                if chunk is None:
+                    continue
+                base_row, base_col = chunk_row << CHUNK_SHIFT, chunk_col << CHUNK_SHIFT
+                for r, mask in enumerate(chunk.row_masks):
+                    row = base_row + r
+                    if not mask or not top <= row < bottom:
+                        continue
+                    while mask:
+                        low = mask & -mask
+                        col = base_col + low.bit_length() - 1
+                        if left <= col < right:
+                            cells.append((row, col))
+                        mask ^= low
+        cells.sort()
+        return cells
+
+    def is_connected(self):
+        if not self.count:
+            return True
+        occupied = set(self.cells())
+        start = next(iter(occupied))
+        seen = {start}
+        stack = [start]
+        while stack:
+            row, col = stack.pop()
+            for cell in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if cell in occupied and cell not in seen:
+                    seen.add(cell)
+                    stack.append(cell)
+        return len(seen) == len(occupied)
+
+    def row_mask(self, chunk_row, chunk_col, r):
+        # Row mask r of a chunk; rows outside 0..CHUNK_SIZE-1 spill into the
+        # chunk above or below, and missing chunks read as empty
+        chunk_row += r >> CHUNK_SHIFT
+        chunk = self.chunks.get((chunk_row, chunk_col))
+        return chunk.row_masks[r & CHUNK_MASK] if chunk is not None else 0
+
+    def anchors(self):
+        # Empty cells orthogonally next to at least one tile, found with row
+        # mask shifts over the occupied chunks and their direct neighbours
+        full = (1 << CHUNK_SIZE) - 1
+        top_bit = 1 << (CHUNK_SIZE - 1)
+        keys = set()
+        for chunk_row, chunk_col in self.chunks:
+            keys.update(((chunk_row, chunk_col), (chunk_row - 1, chunk_col), (chunk_row + 1, chunk_col),
+                         (chunk_row, chunk_col - 1), (chunk_row, chunk_col + 1)))
+        anchors = []
+        for chunk_row, chunk_col in keys:
+            for r in range(CHUNK_SIZE):
+                mask = self.row_mask(chunk_row, chunk_col, r)
+                neighbours = (mask << 1) | (mask >> 1)
+                neighbours |= self.row_mask(chunk_row, chunk_col, r - 1) | self.row_mask(chunk_row, chunk_col, r + 1)
+                if self.row_mask(chunk_row, chunk_col - 1, r) & top_bit:
+                    neighbours |= 1
+                if self.row_mask(chunk_row, chunk_col + 1, r) & 1:
+                    neighbours |= top_bit
+                neighbours &= full & ~mask
+                row = (chunk_row << CHUNK_SHIFT) + r
+                while neighbours:
+                    low = neighbours & -neighbours
+                    anchors.append((row, (chunk_col << CHUNK_SHIFT) + low.bit_length() - 1))
+                    neighbours ^= low
+        anchors.sort()
+        return anchors
+
+
+def logged(opcode):
+    # Appends the call to the game's event log, if it has one, once the
+    # action has been applied
+    def decorate(method):
+        def wrapper(self, *args):
+            result = method(self, *args)
+            if self.log is not None:
+                self.log.record(opcode, *args)
+            return result
+        wrapper.__name__ = method.__name__
+        return wrapper
+    return decorate
+
+
+class Game:
+    # A tile being dragged is "held": it has left the rack or board but has
+    # not been dropped anywhere yet. Picking a tile up snapshots the state;
+    # once the tile lands somewhere new that snapshot becomes an undo step.
+    __slots__ = ("seed", "distribution", "rack_size", "sets", "pool", "rack", "board", "held", "held_from",
+                 "log", "history", "pending", "undo_stack", "redo_stack")
+
+    def __init__(self, seed=None, distribution=LETTER_DISTRIBUTION, rack_size=OPENING_RACK_SIZE, sets=1,
+                 history=True):
+        # Always keep a concrete seed so any game can be replayed exactly
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.distribution = dict(distribution)
+        self.rack_size = rack_size
+        self.sets = sets
+        self.pool = TilePool(distribution, random.Random(self.seed), sets)
+        self.rack = Rack()
+        self.board = Board()
+        self.held = None
+        self.held_from = None
+        self.log = None  # an eventlog.EventLogWriter, set by whoever wants one
+        self.history = history  # keep undo/redo steps; simulations can skip the snapshots
+        self.pending = None  # snapshot from before the held tile was picked up
+        self.undo_stack = []
+        self.redo_stack = []
+        self.rack.add(letter for letter in (self.pool.draw_tile() for _ in range(rack_size)) if letter)
+
+    @logged(PICK_RACK)
+    def pick_from_rack(self, index):
+        if self.held is not None or not 0 <= index < len(self.rack):
+            return None
+        if self.history:
+            self.pending = self.snapshot()
+        self.held = self.rack.remove(index)
+        self.held_from = None
+        return self.held
+
+    @logged(PICK_BOARD)
+    def pick_from_board(self, row, col):
+        if self.held is not None or self.board.get(row, col) is None:
+            return None
+        if self.history:
+            self.pending = self.snapshot()
+        self.held = self.board.remove(row, col)
+        self.held_from = (row, col)
+        return self.held
+
+    @logged(DROP_BOARD)
+    def drop_on_board(self, row, col):
+        # Returns the cell the held tile ended up in, or None if it went back
+        # to the rack.
+        letter, origin = self.release()
+        if letter is None:
+            return None
+        destination = None
+        if self.board.place(row, col, letter):
+            destination = (row, col)
+        elif origin and self.board.place(*origin, letter):
+            destination = origin
+        if destination is None:
+            self.rack.add([letter])
+        self.commit(destination == origin)
+        return destination
+
+    @logged(DROP_RACK)
+    def drop_on_rack(self):
+        letter, origin = self.release()
+        if letter is not None:
+            self.rack.add([letter])
+            self.commit(origin is None)
+        return letter
+
+    @logged(DUMP)
+    def dump(self):
+        # Returns the letters drawn, or None if the pool is too small to dump
+        # and the held tile went back to the rack instead.
+        letter, origin = self.release()
+        if letter is None:
+            return None
+        drawn = self.pool.dump_tiles(letter)
+        if not drawn:
+            self.rack.add([letter])
+            self.commit(origin is None)
+            return None
+        self.rack.add(drawn)
+        self.commit(False)
+        return drawn
+
+    @logged(RESET)
+    def reset(self):
+        before = self.snapshot() if self.history and self.held is None and len(self.board) else None
+        letters = self.board.clear()
+        self.rack.add(letters)
+        if before is not None:
+            self.push_undo(before)
+        return letters
+
+    @logged(PEEL)
+    def peel(self):
+        # Solitaire peel: once the rack is empty, draw the next tile
+        if self.held is not None or self.rack.letters or not len(self.pool):
+            return None
+        before = self.snapshot() if self.history else None
+        letter = self.pool.draw_tile()
+        self.rack.add([letter])
+        if before is not None:
+            self.push_undo(before)
+        return letter
+
+    @logged(UNDO)
+    def undo(self):
+        if self.held is not None or not self.undo_stack:
+            return False
+        self.redo_stack.append(self.snapshot())
+        self.restore(self.undo_stack.pop())
+        return True
+
+    @logged(REDO)
+    def redo(self):
+        if self.held is not None or not self.redo_stack:
+            return False
+        self.undo_stack.append(self.snapshot())
+        self.restore(self.redo_stack.pop())
+        return True
+
+    def commit(self, same_place):
+        # The held tile has landed: unless it is back exactly where it came
+        # from, the state before it was picked up becomes an undo step
+        if self.pending is not None and not (same_place and tuple(self.rack.letters) == self.pending.rack):
+            self.push_undo(self.pending)
+        self.pending = None
+
+    def push_undo(self, snapshot):
+        self.undo_stack.append(snapshot)
+        self.redo_stack.clear()
+
+    # Snapshots share structure with the live game, so taking one is O(1)
+    # (plus a copy of the rack); search code can branch with them too.
+    def snapshot(self):
+        if self.held is not None:
+            raise ValueError("cannot snapshot while a tile is held")
+        return GameSnapshot(self.board.snapshot(), tuple(self.rack.letters), self.pool.snapshot())
+
+    def changed_since(self, snapshot):
+        # O(1) for the board and pool: if nothing was written since the
+        # snapshot, the live game still holds the very same objects
+        return (self.held is not None or self.board.chunks is not snapshot.board.chunks or
+                self.pool.saved is not snapshot.pool or tuple(self.rack.letters) != snapshot.rack)
+
+    def restore(self, snapshot):
+        self.held = self.held_from = self.pending = None
+        self.board.restore(snapshot.board)
+        self.rack.letters = list(snapshot.rack)
+        self.pool.restore(snapshot.pool)
+
+    def fork(self):
+        # An independent game for simulations, sharing every chunk with this
+        # one until either writes to it; it has no log or history
+        game = Game.__new__(Game)
+        game.seed = self.seed
+        game.distribution = self.distribution
+        game.rack_size = self.rack_size
+        game.sets = self.sets
+        game.pool = TilePool(self.distribution, random.Random(), self.sets)
+        game.rack = Rack()
+        game.board = Board()
+        game.log = None
+        game.history = False
+        game.undo_stack = []
+        game.redo_stack = []
+        game.restore(self.snapshot())
+        return game
+
+    def release(self):
+        letter, origin = self.held, self.held_from
+        self.held = self.held_from = None
+        return letter, origin
+
+    # Scripted interface: one call per turn, for simulations and replays.
+    def play(self, index, row, col):
+        if self.pick_from_rack(index) is None:
+            return None
+        return self.drop_on_board(row, col)
+
+    def move(self, row, col, to_row, to_col):
+        if self.pick_from_board(row, col) is None:
+            return None
+        return self.drop_on_board(to_row, to_col)
+
+    def take(self, row, col):
+        if self.pick_from_board(row, col) is None:
+            return None
+        return self.drop_on_rack()
+
+    def dump_from_rack(self, index):
+        if self.pick_from_rack(index) is None:
+            return None
+        return self.dump()
+
+    def apply(self, action):
+        name, *args = action
+        return getattr(self, ACTIONS[name])(*args)
+
+
+ACTIONS = {
+    "pick_rack": "pick_from_rack",
+    "pick_board": "pick_from_board",
+    "drop_board": "drop_on_board",
+    "drop_rack": "drop_on_rack",
+    "dump": "dump",
+    "reset": "reset",
+    "play": "play",
+    "move": "move",
+    "take": "take",
+    "dump_rack": "dump_from_rack",
+    "peel": "peel",
+    "undo": "undo",
+    "redo": "redo",
+}
@@ -0,0 +1,185 @@
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+from constants import LOG_DIR
+from util import setting_path
+
+# Compact append-only game log.
+#
+# Header: MAGIC, version (u8), flags (u8), seed (u64), rack size (u16), sets
+# (u16), letter count (u8) then (letter byte, count u16) per letter.
+# Records: opcode (u8) followed by its arguments as zigzag varints; with
+# FLAG_DIGESTS every record is followed by a u32 digest of the game state.
+
+MAGIC = b"BNLG"
+VERSION = 1
+FLAG_DIGESTS = 1
+
+PICK_RACK = 1
+PICK_BOARD = 2
+DROP_BOARD = 3
+DROP_RACK = 4
+DUMP = 5
+RESET = 6
+UNDO = 7
+REDO = 8
+PEEL = 9
+
+# opcode -> (Game method, number of arguments)
+OPCODES = {
+    PICK_RACK: ("pick_from_rack", 1),
+    PICK_BOARD: ("pick_from_board", 2),
+    DROP_BOARD: ("drop_on_board", 2),
+    DROP_RACK: ("drop_on_rack", 0),
+    DUMP: ("dump", 0),
+    RESET: ("reset", 0),
+    UNDO: ("undo", 0),
+    REDO: ("redo", 0),
+    PEEL: ("peel", 0),
+}
+
+FLUSH_BYTES = 4096
+HEADER = struct.Struct("<4sBBQHHB")
+LETTER = struct.Struct("<cH")
+DIGEST = struct.Struct("<I")
+
+
+def encode_varint(value, out):
+    value = (value << 1) ^ (value >> 63)  # zigzag: small negatives stay small
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, pos):
+    shift = result = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        shift += 7
+    return (result >> 1) ^ -(result & 1), pos
+
+
+def state_digest(game):
+    data = bytearray("".join(game.rack.letters), "ascii")
+    for row, col in game.board.occupied_cells():
+        encode_varint(row, data)
+        encode_varint(col, data)
+        data += game.board.get(row, col).encode("ascii")
+    data += bytes(min(count, 255) for count in game.pool.counts)
+    data += (game.held or "").encode("ascii")
+    return zlib.crc32(data)
+
+
+def encode_header(game, digests):
+    distribution = game.distribution
+    data = bytearray(HEADER.pack(MAGIC, VERSION, FLAG_DIGESTS if digests else 0, game.seed,
+                                 game.rack_size, game.sets, len(distribution)))
+    for letter, count in distribution.items():
+        data += LETTER.pack(letter.encode("ascii"), count)
+    return data
+
+
+def default_log_path(seed):
+    # None when logging is switched off
+    directory = setting_path(None, "BANANA_LOG_DIR", LOG_DIR)
+    if not directory:
+        return None
+    return os.path.join(directory, f"game-{time.strftime('%Y%m%d-%H%M%S')}-{seed}.bnlg")
+
+
+class EventLogWriter:
+    # Records are encoded into an in-memory buffer; full buffers are handed
+    # to a background thread that does the actual file I/O, so recording an
+    # action never waits on the disk.
+    def __init__(self, path, game, digests=False):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.game = game
+        self.digests = digests
+        self.buffer = encode_header(game, digests)
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.drain, args=(open(path, "wb"),), daemon=True)
+        self.thread.start()
+
+    def drain(self, f):
+        with f:
+            while True:
+                chunk = self.queue.get()
+                if chunk is None:
+                    break
+                f.write(chunk)
+
+    def record(self, opcode, *args):
+        buffer = self.buffer
+        buffer.append(opcode)
+        for arg in args:
+            encode_varint(arg, buffer)
+        if self.digests:
+            buffer += DIGEST.pack(state_digest(self.game))
+        if len(buffer) >= FLUSH_BYTES:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.queue.put(bytes(self.buffer))
+            self.buffer = bytearray()
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+
+class EventLog:
+    def __init__(self, data):
+        magic, version, flags, seed, rack_size, sets, letters = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a game log, or written by an unsupported version")
+        pos = HEADER.size
+        distribution = {}
+        for _ in range(letters):
+            letter, count = LETTER.unpack_from(data, pos)
+            distribution[letter.decode("ascii")] = count
+            pos += LETTER.size
+        self.seed = seed
+        self.rack_size = rack_size
+        self.sets = sets
+        self.distribution = distribution
+        self.digests = bool(flags & FLAG_DIGESTS)
+        self.data = data
+        self.start = pos
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def records(self):
+        # Yields (opcode, args, digest or None)
+        data, pos = self.data, self.start
+        while pos < len(data):
+            opcode = data[pos]
+            pos += 1
+            if opcode not in OPCODES:
+                raise ValueError(f"unknown opcode {opcode} at byte {pos - 1}")
+            args = []
+            for _ in range(OPCODES[opcode][1]):
+                value, pos = decode_varint(data, pos)
+                args.append(value)
+            digest = None
+            if self.digests:
+                digest, = DIGEST.unpack_from(data, pos)
+                pos += DIGEST.size
+            yield opcode, args, digest
@@ -0,0 +1,167 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import pygame
+
+from constants import *
+
+from engine import Board
+from solver import Solver
+from odds import DumpOdds
+from validator import WordValidator, ACROSS, DOWN
+from words import load_words
+
+# Posted when a job finishes: event.channel, event.generation, and either
+# event.result or event.error.
+JOB_DONE = pygame.event.custom_type()
+
+
+class JobRunner:
+    # Runs slow work on a pool so the game loop keeps drawing. Every job is
+    # submitted on a channel ("hint", "status", ...) that carries a generation
+    # number; a newer job or cancel() bumps it, a queued job that has gone
+    # stale is never started, and a finished one is dropped instead of posted.
+    # Jobs only ever see immutable game snapshots, never the live objects.
+    def __init__(self, workers=JOB_WORKERS, processes=JOB_PROCESSES, initializer=None, initargs=()):
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self.executor = executor(workers, initializer=initializer, initargs=initargs)
+        self.generations = {}
+        self.futures = {}
+
+    def submit(self, channel, func, *args):
+        generation = self.cancel(channel)
+        future = self.executor.submit(func, *args)
+        self.futures[channel] = future
+        future.add_done_callback(lambda done: self.deliver(channel, generation, done))
+        return generation
+
+    def cancel(self, channel):
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        future = self.futures.pop(channel, None)
+        if future is not None:
+            future.cancel()
+        return generation
+
+    def pending(self, channel):
+        future = self.futures.get(channel)
+        return future is not None and not future.done()
+
+    def deliver(self, channel, generation, future):
+        # Runs on a worker (or pool management) thread; pygame.event.post is
+        # safe to call from there
+        if future.cancelled() or self.generations.get(channel) != generation:
+            return
+        error = future.exception()
+        result = None if error is not None else future.result()
+        pygame.event.post(pygame.event.Event(JOB_DONE, channel=channel, generation=generation,
+                                             result=result, error=error))
+
+    def is_current(self, event):
+        # A result can still go stale between being posted and being handled
+        return self.generations.get(event.channel) == event.generation
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Job functions run on the workers. They are module-level so a process pool
+# can pickle them; the word list is loaded once per worker by init_worker.
+_words = None
+_solver = None
+_odds = None
+
+
+def init_worker(words):
+    # Threads share the game's word list (None without one); processes are
+    # handed a path and load (or memory-map) their own. The solver's index is
+    # built here, before the first job, rather than by the first H.
+    global _words, _solver, _odds
+    _words = load_words(words) if isinstance(words, str) else words
+    _solver = Solver(_words) if _words is not None else None
+    _odds = None
+
+
+def board_from(snapshot):
+    board = Board()
+    board.restore(snapshot.board)
+    return board
+
+
+def find_hint(snapshot, time_budget, origin):
+    return _solver.solve(board_from(snapshot), snapshot.rack, time_budget, origin)
+
+
+def dump_advice(snapshot, letters, rarity):
+    # Which rack letter to dump, and the odds of what comes back. With a
+    # word list, letters that would complete a word on the board count as
+    # wanted draws.
+    global _odds
+    if _odds is None:
+        _odds = DumpOdds(letters)
+    needed = ()
+    if _words is not None and snapshot.rack:
+        in_pool = [letter for letter, count in zip(letters, snapshot.pool[0]) if count]
+        needed = needed_letters(board_from(snapshot), in_pool)
+    return _odds.advise(snapshot.pool[0], snapshot.rack, needed, rarity)
+
+
+def needed_letters(board, letters, limit=NEEDED_LETTERS):
+    # The letters that complete the most, and the longest, words on the
+    # board: a letter scores at every empty cell next to the tiles where it
+    # makes each run through that cell a word, by the longest such word.
+    # Only membership lookups, so this works straight off a memory-mapped
+    # word list.
+    scores = {}
+    for row, col in board.anchors():
+        runs = [run_around(board, row, col, direction) for direction in (ACROSS, DOWN)]
+        runs = [run for run in runs if run[0] or run[1]]
+        for letter in letters:
+            words = [before + letter + after for before, after in runs]
+            if all(word in _words for word in words):
+                scores[letter] = scores.get(letter, 0) + max(map(len, words))
+    return sorted(scores, key=lambda letter: (-scores[letter], letter))[:limit]
+
+
+def run_around(board, row, col, direction):
+    # The tiles directly before and after an empty cell along direction
+    dr, dc = direction
+    before = []
+    r, c = row - dr, col - dc
+    while (letter := board.get(r, c)) is not None:
+        before.append(letter)
+        r, c = r - dr, c - dc
+    after = []
+    r, c = row + dr, col + dc
+    while (letter := board.get(r, c)) is not None:
+        after.append(letter)
+        r, c = r + dr, c + dc
+    return "".join(reversed(before)), "".join(after)
+
+
+def board_status(snapshot):
+    # Full re-validation of a snapshot, independent of the incremental
+    # validator the UI uses for highlighting
+    board = board_from(snapshot)
+    validator = WordValidator(board, _words)
+    for row, col in board.occupied_cells():
+        validator.update(row, col)
+    bad_words = sorted(validator.invalid_words())
+    connected = board.is_connected()
+    pool_size = sum(snapshot.pool[0])
+    return {
+        "tiles": len(board),
+        "bad_words": bad_words,
+        "connected": connected,
+        "solved": bool(len(board)) and not bad_words and connected and not snapshot.rack and not pool_size,
+    }
+
+
+def status_text(status):
+    if status["solved"]:
+        return "Bananas!"
+    if status["bad_words"]:
+        count = len(status["bad_words"])
+        return f"{count} bad word{'s' if count > 1 else ''}"
+    if not status["connected"]:
+        return "Not connected"
+    return "All words OK" if status["tiles"] else ""
@@ -1,154 +1,196 @@
+import atexit
+import os
+import sys
+import traceback
+
 import pygame
-import random
-import math
-
-# Constants
-TILE_SIZE = 50
-GRID_WIDTH = 16
-GRID_HEIGHT = 16
-SIDE_PANEL_WIDTH = 150
-BOTTOM_BAR_HEIGHT = TILE_SIZE * 2
-DUMP_AREA_HEIGHT = TILE_SIZE
-BUTTON_HEIGHT = 50
-WINDOW_WIDTH = GRID_WIDTH * TILE_SIZE + SIDE_PANEL_WIDTH
-WINDOW_HEIGHT = GRID_HEIGHT * TILE_SIZE + BOTTOM_BAR_HEIGHT + DUMP_AREA_HEIGHT + BUTTON_HEIGHT
-FONT_SIZE = 36
-BG_COLOR = (255, 255, 255)
-TILE_COLOR = (200, 200, 200)
-DUMP_COLOR = (220, 120, 120)
-BUTTON_COLOR = (100, 200, 100)
-BUTTON_TEXT_COLOR = (255, 255, 255)
-TEXT_COLOR = (0, 0, 0)
-GRID_COLOR = (0, 0, 0)
-POOL_TEXT_COLOR = (50, 50, 50)
-BG_COLOR_TOP = (234, 163, 255)
-BG_COLOR_BOTTOM = (41, 71, 102)
-TILE_SHADOW_COLOR = (98, 131, 166)
-TILE_BORDER_COLOR = (15, 36, 59)
-
-LETTER_DISTRIBUTION = {
-    "A": 13, "B": 3, "C": 3, "D": 6, "E": 18, "F": 3,
-    "G": 4, "H": 3, "I": 12, "J": 2, "K": 2, "L": 5,
-    "M": 3, "N": 8, "O": 11, "P": 3, "Q": 2, "R": 9,
-    "S": 6, "T": 9, "U": 6, "V": 3, "W": 3, "X": 2,
-    "Y": 3, "Z": 2
-}
-
-def draw_gradient_background(screen):
-    for y in range(WINDOW_HEIGHT):
-        color = (
-            BG_COLOR_TOP[0] + (BG_COLOR_BOTTOM[0] - BG_COLOR_TOP[0]) * y // WINDOW_HEIGHT,
-            BG_COLOR_TOP[1] + (BG_COLOR_BOTTOM[1] - BG_COLOR_TOP[1]) * y // WINDOW_HEIGHT,
-            BG_COLOR_TOP[2] + (BG_COLOR_BOTTOM[2] - BG_COLOR_TOP[2]) * y // WINDOW_HEIGHT,
-        )
-        pygame.draw.line(screen, color, (0, y), (WINDOW_WIDTH, y))
+
+from constants import *
+from background import BackgroundLayer, draw_gradient_background
+from sprites import get_tile_atlas
+from resources import get_font, render_text
+from renderer import DirtyRenderer, BOARD_LAYER, RACK_LAYER, DRAG_LAYER
+from engine import Game
+from words import load_words, word_list_path
+from validator import WordValidator
+from animation import Animator, shared_animator
+from scheduler import FrameScheduler
+from viewport import Viewport
+from eventlog import EventLogWriter, default_log_path
+from profiler import FrameProfiler, MetricsExporter, ProfilerHud
+from jobs import JOB_DONE, JobRunner, init_worker, find_hint, board_status, status_text, dump_advice
+from odds import rarity_bonus
+
+# Arrow keys scroll the board one cell at a time: key -> (dx, dy) in cells
+PAN_KEYS = {pygame.K_LEFT: (1, 0), pygame.K_RIGHT: (-1, 0), pygame.K_UP: (0, 1), pygame.K_DOWN: (0, -1)}
 
 class Tile:
-    def __init__(self, letter, x, y):
+    # A lightweight handle: position and target live in the Animator's packed
+    # arrays, the Tile itself only knows its letter and slot.
+    __slots__ = ("letter", "animator", "slot")
+
+    def __init__(self, letter, x, y, animator=None):
         if not isinstance(letter, str):  # Ensure letter is a string
             raise ValueError(f"Invalid letter: {letter}")
         self.letter = letter
-        self.x = float(x)  # Use float for smooth movement
-        self.y = float(y)
-        self.target_x = float(x)
-        self.target_y = float(y)
-        self.speed = 15
-
-    def draw(self, screen, font):
-        # Shadow
-        pygame.draw.rect(screen, TILE_SHADOW_COLOR, (int(self.x) + 4, int(self.y) + 4, TILE_SIZE, TILE_SIZE), border_radius=8)
-        # Tile
-        pygame.draw.rect(screen, TILE_COLOR, (int(self.x), int(self.y), TILE_SIZE, TILE_SIZE), border_radius=8)
-        pygame.draw.rect(screen, TILE_BORDER_COLOR, (int(self.x), int(self.y), TILE_SIZE, TILE_SIZE), 2, border_radius=8)
-        # Letter
-        text = font.render(self.letter, True, TEXT_COLOR)
-        text_rect = text.get_rect(center=(int(self.x) + TILE_SIZE // 2, int(self.y) + TILE_SIZE // 2))
-        screen.blit(text, text_rect)
-
-    def move_towards_target(self):
-        dx = self.target_x - self.x
-        dy = self.target_y - self.y
-        distance = math.hypot(dx, dy)
-        if distance > self.speed:
-            self.x += dx / distance * self.speed
-            self.y += dy / distance * self.speed
-        else:
-            self.x = self.target_x
-            self.y = self.target_y
+        self.animator = animator if animator is not None else shared_animator()
+        self.slot = self.animator.allocate(float(x), float(y))
 
+    @property
+    def x(self):
+        return self.animator.x[self.slot]
 
-class TilePool:
-    def __init__(self):
-        self.pool = [letter for letter, count in LETTER_DISTRIBUTION.items() for _ in range(count)]
-        random.shuffle(self.pool)
+    @x.setter
+    def x(self, value):
+        self.animator.set_position(self.slot, value, self.y)
 
-    def draw_tile(self):
-        if self.pool:
-            return self.pool.pop()
-        return None
+    @property
+    def y(self):
+        return self.animator.y[self.slot]
+
+    @y.setter
+    def y(self, value):
+        self.animator.set_position(self.slot, self.x, value)
+
+    @property
+    def target_x(self):
+        return self.animator.target_x[self.slot]
+
+    @property
+    def target_y(self):
+        return self.animator.target_y[self.slot]
+
+    def move_to(self, x, y):
+        self.animator.set_target(self.slot, x, y)
 
-    def draw_counter(self, screen, font):
-        counter_text = f"Tiles: {len(self.pool)}"
-        text = font.render(counter_text, True, POOL_TEXT_COLOR)
-        screen.blit(text, (GRID_WIDTH * TILE_SIZE + 20, 20))
+    def snap_to(self, x, y):
+        self.animator.snap(self.slot, x, y)
 
-    def dump_tiles(self, letter):
-        if len(self.pool) >= 3:
-            self.pool.append(letter)
-            random.shuffle(self.pool)
-            return [self.draw_tile() for _ in range(3)]
-        return []
+    def release(self):
+        # The tile is gone for good (dumped or replaced); free its slot
+        self.animator.release(self.slot)
 
+    def draw(self, screen, atlas, highlighted=False, invalid=False):
+        screen.blit(atlas.get(self.letter, highlighted, invalid), (int(self.x), int(self.y)))
+
+    def sprite(self, atlas, highlighted=False, invalid=False):
+        return id(self), atlas.get(self.letter, highlighted, invalid), (int(self.x), int(self.y))
+
+
+class PoolCounter:
+    def __init__(self, pool):
+        self.pool = pool
+        self.cache = (None, None)
+
+    def counter_sprite(self):
+        # Re-rendered only when the pool size changes; every count is a new
+        # string, so it bypasses the shared text cache
+        count, text = self.cache
+        if count != len(self.pool):
+            text = get_font().render(f"Tiles: {len(self.pool)}", True, POOL_TEXT_COLOR)
+            self.cache = (len(self.pool), text)
+        return "counter", text, (GRID_WIDTH * TILE_SIZE + 20, 20)
+
+    def draw_counter(self, screen):
+        _, text, pos = self.counter_sprite()
+        screen.blit(text, pos)
+
+class AdvicePanel:
+    # Dump advice under the board status: the letter to dump and the odds of
+    # drawing a vowel, or one of the letters the rack is waiting for
+    def __init__(self):
+        self.advice = None
+        self.surface = None
+
+    def update(self, advice):
+        self.advice = advice
+        self.surface = None
+
+    def lines(self):
+        advice = self.advice
+        lines = [f"Dump {advice.letter}", f"vowel {advice.vowel_odds:.0%}"]
+        if advice.needed:
+            lines.append(f"{'/'.join(advice.needed[:3])} {advice.needed_odds:.0%}")
+        return lines
+
+    def sprite(self):
+        if self.advice is None:
+            return None
+        if self.surface is None:
+            rendered = [render_text(line, POOL_TEXT_COLOR, None, HUD_FONT_SIZE) for line in self.lines()]
+            height = get_font(None, HUD_FONT_SIZE).get_linesize()
+            self.surface = pygame.Surface((SIDE_PANEL_WIDTH - 20, height * len(rendered)), pygame.SRCALPHA)
+            for i, text in enumerate(rendered):
+                self.surface.blit(text, (0, i * height))
+        return "advice", self.surface, (GRID_WIDTH * TILE_SIZE + 20, 85)
+
+# The classes below are views: the Game engine owns the letters, these only
+# own the on-screen Tile sprites that mirror them.
 class PlayerBar:
-    def __init__(self, screen):
+    # Pushes its tiles to the renderer (when one is attached) after the rack
+    # changes and while they glide to their slots
+    def __init__(self, screen, atlas, animator=None):
         self.screen = screen
-        self.font = pygame.font.Font(None, FONT_SIZE)
+        self.atlas = atlas
+        self.animator = animator if animator is not None else shared_animator()
         self.tiles = []
+        self.renderer = None
+        self.changed = True
+        self.moving = False
 
-    def draw(self):
-        # Determine the number of rows required for the current number of tiles
+    def layout(self):
+        # Send every tile to its slot; called whenever the rack changes, so
+        # the tiles keep their targets between frames
         num_tiles_per_row = (WINDOW_WIDTH - SIDE_PANEL_WIDTH) // TILE_SIZE
-        num_rows = math.ceil(len(self.tiles) / num_tiles_per_row)
-        
+
         for i, tile in enumerate(self.tiles):
             row = i // num_tiles_per_row
             col = i % num_tiles_per_row
             x = col * TILE_SIZE
             y = GRID_HEIGHT * TILE_SIZE + DUMP_AREA_HEIGHT + BUTTON_HEIGHT + row * TILE_SIZE
-            tile.target_x = x
-            tile.target_y = y
-            tile.move_towards_target()
-            tile.draw(self.screen, self.font)
+            tile.move_to(x, y)
+        self.changed = True
+
+    def draw(self):
+        for tile in self.tiles:
+            tile.draw(self.screen, self.atlas)
+
+    def refresh(self):
+        # Run after the animation step. One more pass after the tiles stop
+        # moving puts the ones that just arrived at their final spot.
+        moving = self.animator.is_moving()
+        if self.renderer is not None and (self.changed or moving or self.moving):
+            for tile in self.tiles:
+                self.renderer.set(*tile.sprite(self.atlas), layer=RACK_LAYER)
+        self.changed = False
+        self.moving = moving
 
     def add_tiles(self, items):
         for item in items:
             if isinstance(item, Tile):
-                # Reset the tile's target position to the player bar area
-                tile_width = TILE_SIZE
-                tile_height = TILE_SIZE
-                num_tiles_per_row = (WINDOW_WIDTH - SIDE_PANEL_WIDTH) // TILE_SIZE
-                num_tiles = len(self.tiles)
-                row = num_tiles // num_tiles_per_row
-                col = num_tiles % num_tiles_per_row
-                x = col * TILE_SIZE
-                y = GRID_HEIGHT * TILE_SIZE + DUMP_AREA_HEIGHT + BUTTON_HEIGHT + row * TILE_SIZE
-                item.target_x = x
-                item.target_y = y
                 self.tiles.append(item)
             elif isinstance(item, str):
-                # Create a new Tile from the letter
-                x = 0  # Initial x position (will be set dynamically during drawing)
+                # Create a new Tile from the letter; layout() gives it its slot
+                x = 0
                 y = GRID_HEIGHT * TILE_SIZE + DUMP_AREA_HEIGHT + BUTTON_HEIGHT
-                self.tiles.append(Tile(item, x, y))
+                self.tiles.append(Tile(item, x, y, self.animator))
             else:
                 raise ValueError(f"Invalid item in add_tiles: {item}")
+        self.layout()
 
     def remove_tile(self, index):
         if 0 <= index < len(self.tiles):
-            return self.tiles.pop(index)
+            tile = self.tiles.pop(index)
+            if self.renderer is not None:
+                self.renderer.remove(id(tile))
+            self.layout()
+            return tile
         return None
 
     def clear(self):
+        if self.renderer is not None:
+            for tile in self.tiles:
+                self.renderer.remove(id(tile))
         self.tiles = []
 
     def get_tile_at_position(self, x, y):
@@ -159,50 +201,110 @@ class PlayerBar:
 
 
 class GameBoard:
-    def __init__(self, screen):
+    # Keeps the renderer's board sprites in step with the tiles: a placed or
+    # removed tile updates its own sprite, a board change re-checks the runs
+    # through that cell (their words may have turned valid or invalid) and
+    # scrolling or zooming re-shows whatever is visible.
+    def __init__(self, screen, atlas, board, viewport, validator=None):
         self.screen = screen
-        self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.font = pygame.font.Font(None, FONT_SIZE)
-
-    def draw_grid(self):
-        for x in range(0, GRID_WIDTH * TILE_SIZE, TILE_SIZE):
-            pygame.draw.line(self.screen, GRID_COLOR, (x, 0), (x, GRID_HEIGHT * TILE_SIZE))
-        for y in range(0, GRID_HEIGHT * TILE_SIZE, TILE_SIZE):
-            pygame.draw.line(self.screen, GRID_COLOR, (0, y), (GRID_WIDTH * TILE_SIZE, y))
+        self.atlas = atlas
+        self.board = board
+        self.viewport = viewport
+        self.validator = validator
+        self.tiles = {}  # (row, col) -> Tile, mirroring the engine's occupied cells
+        self.renderer = None
+        self.shown = {}  # (row, col) -> renderer key of the sprite drawn there
+        self.shown_key = None  # viewport key the shown sprites were placed for
+        board.listeners.append(self.cell_changed)
+
+    def board_atlas(self):
+        # Tiles on the board are drawn at the viewport's zoom level
+        if self.viewport.tile_size == self.atlas.tile_size:
+            return self.atlas
+        return get_tile_atlas(self.atlas.font_face, self.viewport.font_size, self.viewport.tile_size)
+
+    def draw_grid(self, surface, theme=DEFAULT_THEME):
+        rect = self.viewport.rect
+        top, left, bottom, right = self.viewport.visible_cells()
+        for col in range(left, right):
+            x = self.viewport.cell_to_screen(0, col)[0]
+            if rect.left <= x < rect.right:
+                pygame.draw.line(surface, theme.grid, (x, rect.top), (x, rect.bottom))
+        for row in range(top, bottom):
+            y = self.viewport.cell_to_screen(row, 0)[1]
+            if rect.top <= y < rect.bottom:
+                pygame.draw.line(surface, theme.grid, (rect.left, y), (rect.right, y))
+
+    def visible_cells(self):
+        # Only the chunks under the viewport are touched
+        return [cell for cell in self.board.cells_in(*self.viewport.visible_cells()) if cell in self.tiles]
 
     def draw_tiles(self):
-        for row in range(GRID_HEIGHT):
-            for col in range(GRID_WIDTH):
-                if self.grid[row][col]:
-                    tile = self.grid[row][col]  # Get the Tile object
-                    if isinstance(tile, Tile):  # Ensure it's a Tile object
-                        tile.draw(self.screen, self.font)
+        atlas = self.board_atlas()
+        self.screen.set_clip(self.viewport.rect)
+        for row, col in self.visible_cells():
+            sprite = atlas.get(self.tiles[(row, col)].letter, invalid=self.is_invalid(row, col))
+            self.screen.blit(sprite, self.viewport.cell_to_screen(row, col))
+        self.screen.set_clip(None)
+
+    def is_invalid(self, row, col):
+        return self.validator is not None and self.validator.is_invalid(row, col)
+
+    def show(self, row, col):
+        # Put the tile at (row, col) on screen, or take it off if the cell is
+        # empty or scrolled out of view
+        if self.renderer is None:
+            return
+        tile = self.tiles.get((row, col))
+        top, left, bottom, right = self.viewport.visible_cells()
+        if tile is None or not (top <= row < bottom and left <= col < right):
+            key = self.shown.pop((row, col), None)
+            if key is not None:
+                self.renderer.remove(key)
+            return
+        self.shown[(row, col)] = id(tile)
+        self.renderer.set(id(tile), self.board_atlas().get(tile.letter, invalid=self.is_invalid(row, col)),
+                          self.viewport.cell_to_screen(row, col), self.viewport.rect, BOARD_LAYER + (row, col))
+
+    def refresh(self):
+        if self.renderer is None or self.shown_key == self.viewport.key:
+            return
+        self.shown_key = self.viewport.key
+        for key in self.shown.values():
+            self.renderer.remove(key)
+        self.shown = {}
+        for cell in self.visible_cells():
+            self.show(*cell)
+
+    def cell_changed(self, row, col):
+        # Runs after the validator's listener, so the tiles along the row and
+        # column through (row, col) already know whether they are invalid
+        if self.validator is None:
+            return
+        for dr, dc in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            r, c = row + dr, col + dc
+            while self.board.get(r, c) is not None:
+                self.show(r, c)
+                r, c = r + dr, c + dc
 
     def place_tile(self, row, col, tile):
-        if isinstance(tile, Tile) and 0 <= row < GRID_HEIGHT and 0 <= col < GRID_WIDTH:
-            if self.grid[row][col] is None:  # Ensure the cell is empty
-                tile.target_x = col * TILE_SIZE
-                tile.target_y = row * TILE_SIZE
-                tile.x = tile.target_x
-                tile.y = tile.target_y
-                self.grid[row][col] = tile
-                return True
+        if isinstance(tile, Tile) and (row, col) not in self.tiles:  # Ensure the cell is empty
+            tile.snap_to(*self.viewport.cell_to_screen(row, col))
+            self.tiles[(row, col)] = tile
+            self.show(row, col)
+            return True
         return False
 
     def remove_tile(self, row, col):
-        if 0 <= row < GRID_HEIGHT and 0 <= col < GRID_WIDTH:
-            tile = self.grid[row][col]
-            self.grid[row][col] = None
-            return tile
-        return None
+        tile = self.tiles.pop((row, col), None)
+        self.show(row, col)
+        return tile
 
     def clear_board(self):
-        tiles = []
-        for row in range(GRID_HEIGHT):
-            for col in range(GRID_WIDTH):
-                if self.grid[row][col]:
-                    tiles.append(self.grid[row][col])
-                    self.grid[row][col] = None
+        tiles = [self.tiles[cell] for cell in sorted(self.tiles)]
+        self.tiles = {}
+        for cell in list(self.shown):
+            self.show(*cell)
         return tiles
 
 
@@ -211,12 +313,11 @@ class DumpArea:
         self.screen = screen
         self.rect = pygame.Rect(0, GRID_HEIGHT * TILE_SIZE, GRID_WIDTH * TILE_SIZE, DUMP_AREA_HEIGHT)
 
-    def draw(self):
-        pygame.draw.rect(self.screen, DUMP_COLOR, self.rect)
-        font = pygame.font.Font(None, FONT_SIZE)
-        text = font.render("Dump Area", True, TEXT_COLOR)
+    def draw(self, surface, theme=DEFAULT_THEME):
+        pygame.draw.rect(surface, theme.dump, self.rect)
+        text = render_text("Dump Area", theme.text)
         text_rect = text.get_rect(center=self.rect.center)
-        self.screen.blit(text, text_rect)
+        surface.blit(text, text_rect)
 
     def is_in_area(self, pos):
         return self.rect.collidepoint(pos)
@@ -226,137 +327,247 @@ class ResetButton:
         self.screen = screen
         self.rect = pygame.Rect(GRID_WIDTH * TILE_SIZE // 2 - 100, GRID_HEIGHT * TILE_SIZE + DUMP_AREA_HEIGHT + 10, 200, BUTTON_HEIGHT)
 
-    def draw(self):
-        pygame.draw.rect(self.screen, BUTTON_COLOR, self.rect)
-        font = pygame.font.Font(None, FONT_SIZE)
-        text = font.render("Reset Board", True, BUTTON_TEXT_COLOR)
+    def draw(self, surface, theme=DEFAULT_THEME):
+        pygame.draw.rect(surface, theme.button, self.rect)
+        text = render_text("Reset Board", theme.button_text)
         text_rect = text.get_rect(center=self.rect.center)
-        self.screen.blit(text, text_rect)
+        surface.blit(text, text_rect)
 
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
 
+def sync_views(game, player_bar, board):
+    # Re-mirror the engine after an undo or redo. Tiles still showing the
+    # right letter in the right cell stay put; the rest are reused for the
+    # letters that moved, so rack tiles glide to their new slots.
+    spare = {}  # letter -> Tiles not yet given a place
+    for cell, tile in list(board.tiles.items()):
+        if game.board.get(*cell) != tile.letter:
+            spare.setdefault(tile.letter, []).append(board.remove_tile(*cell))
+    for tile in player_bar.tiles:
+        spare.setdefault(tile.letter, []).append(tile)
+    player_bar.clear()
+    for cell in game.board.occupied_cells():
+        if cell not in board.tiles:
+            letter = game.board.get(*cell)
+            tiles = spare.get(letter)
+            board.place_tile(*cell, tiles.pop() if tiles else Tile(letter, 0, 0, player_bar.animator))
+    rack = []
+    for letter in game.rack.letters:
+        tiles = spare.get(letter)
+        rack.append(tiles.pop() if tiles else letter)
+    player_bar.add_tiles(rack)
+    for tiles in spare.values():
+        for tile in tiles:
+            tile.release()
+
+
+def place_solution(game, player_bar, board, solution):
+    for row, col, letter in solution.placements:
+        index = game.rack.letters.index(letter)
+        if game.play(index, row, col) == (row, col):
+            board.place_tile(row, col, player_bar.remove_tile(index))
+
+
 # Main game loop
 def main():
     pygame.init()
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Theo B's Banana Solitaire for the Chronically Alone")
-    clock = pygame.time.Clock()
-    pool = TilePool()
-    player_bar = PlayerBar(screen)
-    board = GameBoard(screen)
+    scheduler = FrameScheduler()
+    game = Game()
+    log_path = default_log_path(game.seed)
+    if log_path:
+        # Also closed on a crash, so the log reproduces it
+        game.log = EventLogWriter(log_path, game, digests=True)
+        atexit.register(game.log.close)
+    atlas = get_tile_atlas()
+    animator = Animator()
+    player_bar = PlayerBar(screen, atlas, animator)
+    words = load_words()
+    validator = WordValidator(game.board, words) if words is not None else None
+    viewport = Viewport((0, 0, GRID_WIDTH * TILE_SIZE, GRID_HEIGHT * TILE_SIZE))
+    board = GameBoard(screen, atlas, game.board, viewport, validator)
+    counter = PoolCounter(game.pool)
     dump_area = DumpArea(screen)
     reset_button = ResetButton(screen)
-
-    # Initialize with 15 tiles
-    initial_tiles = [pool.draw_tile() for _ in range(21)]
-    player_bar.add_tiles(initial_tiles)
+    background = BackgroundLayer([draw_gradient_background, dump_area.draw, reset_button.draw], [board.draw_grid])
+    theme = DEFAULT_THEME
+    renderer = DirtyRenderer(screen, background)
+    profiler = FrameProfiler()
+    background.profiler = renderer.profiler = profiler
+    board.renderer = player_bar.renderer = renderer
+    hud = ProfilerHud(scheduler, profiler)
+    metrics_path = os.environ.get("BANANA_METRICS")
+    exporter = MetricsExporter(metrics_path) if metrics_path else None
+
+    # The engine has already dealt the opening rack
+    player_bar.add_tiles(game.rack.letters)
+
+    # Hints and the board status are worked out off the main loop, on
+    # snapshots; a result is used only if the game hasn't changed since
+    jobs = JobRunner(initializer=init_worker, initargs=(word_list_path() if JOB_PROCESSES else words,))
+    game.board.listeners.append(lambda row, col: jobs.cancel("hint"))
+    hint_snapshot = status_snapshot = None
+    status_label = ""
+    advice_panel = AdvicePanel()
+    rarity = rarity_bonus(game.distribution)
 
     dragged_tile = None
     dragging = False
     drag_offset_x = drag_offset_y = 0
-    dragged_from_board = False
-    original_position = None  # To store original position if placement fails
+    panning = False
 
     running = True
+    busy = True  # draw the first frame without waiting for input
     while running:
-        screen.fill(BG_COLOR)
-        draw_gradient_background(screen)
-        board.draw_grid()
-        board.draw_tiles()
-        dump_area.draw()
-        reset_button.draw()
-        pool.draw_counter(screen, board.font)
-        player_bar.draw()
-
-        for event in pygame.event.get():
+        events = scheduler.wait(busy)
+        profiler.start()
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                hud.toggle()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                if profiler.start_capture():
+                    hud.show()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                # Auto-solve: lay out as much of the rack as the solver finds
+                if words is not None and not dragging:
+                    top, left, bottom, right = viewport.visible_cells()
+                    origin = ((top + bottom) // 2, (left + right) // 2)
+                    hint_snapshot = game.snapshot()
+                    jobs.submit("hint", find_hint, hint_snapshot, SOLVER_TIME_BUDGET, origin)
+            elif event.type == JOB_DONE and jobs.is_current(event):
+                if event.error is not None:
+                    # A failed job is a bug; report it with its traceback and play on
+                    print(f"{event.channel} job failed:", file=sys.stderr)
+                    traceback.print_exception(event.error)
+                elif event.channel == "hint" and not game.changed_since(hint_snapshot):
+                    place_solution(game, player_bar, board, event.result)
+                elif event.channel == "status":
+                    status_label = status_text(event.result)
+                elif event.channel == "advice":
+                    advice_panel.update(event.result)
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_z, pygame.K_y) and event.mod & pygame.KMOD_CTRL:
+                # Ctrl+Z undoes, Ctrl+Y or Ctrl+Shift+Z redoes
+                redo = event.key == pygame.K_y or event.mod & pygame.KMOD_SHIFT
+                if not dragging and (game.redo() if redo else game.undo()):
+                    sync_views(game, player_bar, board)
+            elif event.type == pygame.KEYDOWN and event.key in PAN_KEYS:
+                dx, dy = PAN_KEYS[event.key]
+                viewport.pan(dx * viewport.tile_size, dy * viewport.tile_size)
+            elif event.type == pygame.MOUSEWHEEL:
+                mouse_pos = pygame.mouse.get_pos()
+                if viewport.rect.collidepoint(mouse_pos):
+                    viewport.zoom(event.y, mouse_pos)
+            elif event.type == pygame.MOUSEMOTION and panning:
+                viewport.pan(*event.rel)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (2, 3):
+                # Right or middle drag scrolls the board
+                panning = viewport.rect.collidepoint(event.pos)
+            elif event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+                panning = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click
                     x, y = event.pos
                     if reset_button.is_clicked((x, y)):  # Handle Reset Button
-                        cleared_tiles = board.clear_board()
-                        letters = [tile.letter for tile in cleared_tiles if isinstance(tile, Tile)]
-                        player_bar.add_tiles(letters)
+                        for tile in board.clear_board():
+                            tile.release()
+                        player_bar.add_tiles(game.reset())
                     elif y > GRID_HEIGHT * TILE_SIZE + DUMP_AREA_HEIGHT + BUTTON_HEIGHT:
                         # Clicked within the player bar area
                         index, tile = player_bar.get_tile_at_position(x, y)
-                        if tile:
+                        if tile and game.pick_from_rack(index) is not None:
                             dragged_tile = player_bar.remove_tile(index)
                             dragging = True
-                            dragged_from_board = False
                             drag_offset_x = x - tile.x
                             drag_offset_y = y - tile.y
                     else:
                         # Clicked within the board area
-                        col, row = x // TILE_SIZE, y // TILE_SIZE
-                        if 0 <= col < GRID_WIDTH and 0 <= row < GRID_HEIGHT and board.grid[row][col]:
-                            dragged_tile = board.remove_tile(row, col)
+                        cell = viewport.cell_at(x, y)
+                        if cell is not None and game.pick_from_board(*cell) is not None:
+                            dragged_tile = board.remove_tile(*cell)
                             dragging = True
-                            dragged_from_board = True
-                            # Calculate offset within the tile
-                            drag_offset_x = x - (col * TILE_SIZE)
-                            drag_offset_y = y - (row * TILE_SIZE)
-                            original_position = (row, col)
+                            # Calculate offset within the tile, scaled to the
+                            # unzoomed size the dragged tile is drawn at
+                            cell_x, cell_y = viewport.cell_to_screen(*cell)
+                            drag_offset_x = (x - cell_x) * TILE_SIZE // viewport.tile_size
+                            drag_offset_y = (y - cell_y) * TILE_SIZE // viewport.tile_size
             elif event.type == pygame.MOUSEBUTTONUP:
-                if dragging:
+                if dragging and event.button == 1:
                     x, y = event.pos
+                    renderer.remove(id(dragged_tile))  # the rack or the board shows it from here
                     if dump_area.is_in_area((x, y)):  # Dump the tile
-                        dumped_tiles = pool.dump_tiles(dragged_tile.letter)
-                        player_bar.add_tiles(dumped_tiles)
-                        dragged_tile = None
-                        dragging = False
-                        dragged_from_board = False
-                        original_position = None
+                        drawn = game.dump()
+                        if drawn is not None:
+                            dragged_tile.release()
+                        # A pool too small to dump sends the tile back to the rack
+                        player_bar.add_tiles(drawn if drawn is not None else [dragged_tile])
                     else:
-                        # Attempt to place the tile on the board
-                        col, row = x // TILE_SIZE, y // TILE_SIZE
-                        placed = False
-                        if 0 <= col < GRID_WIDTH and 0 <= row < GRID_HEIGHT:
-                            placed = board.place_tile(row, col, dragged_tile)
-                            if placed:
-                                # Successfully placed on the board
-                                pass
-                            else:
-                                # Failed to place on the board (cell occupied)
-                                if dragged_from_board and original_position:
-                                    original_row, original_col = original_position
-                                    # Attempt to return to original position
-                                    placed_back = board.place_tile(original_row, original_col, dragged_tile)
-                                    if not placed_back:
-                                        # If returning to original position fails, add to player bar
-                                        player_bar.add_tiles([dragged_tile])
-                                else:
-                                    # Add back to player bar
-                                    player_bar.add_tiles([dragged_tile])
+                        # The engine falls back to the original cell or the rack
+                        cell = viewport.cell_at(x, y)
+                        destination = game.drop_on_board(*cell) if cell is not None else game.drop_on_rack()
+                        if isinstance(destination, tuple):
+                            board.place_tile(*destination, dragged_tile)
                         else:
-                            # Outside the board, add back to player bar
                             player_bar.add_tiles([dragged_tile])
-                        # Reset dragging state
-                        dragged_tile = None
-                        dragging = False
-                        dragged_from_board = False
-                        original_position = None
-
-        # Move tiles towards their target positions
-        for tile in player_bar.tiles:
-            tile.move_towards_target()
-        for row in range(GRID_HEIGHT):
-            for col in range(GRID_WIDTH):
-                if board.grid[row][col]:
-                    board.grid[row][col].move_towards_target()
-
-        # Draw the dragged tile
+                    dragged_tile = None
+                    dragging = False
+
+        # Advance only the tiles that are still moving
+        profiler.mark("events")
+        animator.step(scheduler.dt * ANIMATION_BASE_FPS / 1000)
+        profiler.mark("animation")
+
+        # The views pushed their tile changes as they happened; bring the
+        # scrolled board and the moving rack up to date, then the side panel
+        board.refresh()
+        player_bar.refresh()
+        profiler.mark("tiles")
+        renderer.set(*counter.counter_sprite())
+        if status_label:
+            renderer.set("status", render_text(status_label, POOL_TEXT_COLOR, None, STATUS_FONT_SIZE),
+                         (GRID_WIDTH * TILE_SIZE + 20, 55))
+        else:
+            renderer.remove("status")
+        advice_sprite = advice_panel.sprite()
+        if advice_sprite is not None:
+            renderer.set(*advice_sprite)
+        if hud.visible:
+            renderer.set(*hud.sprite())
+        else:
+            renderer.remove("hud")
+        profiler.mark("widgets")
+
+        # Follow the cursor with the dragged tile
         if dragging and dragged_tile:
             mouse_x, mouse_y = pygame.mouse.get_pos()
-            dragged_tile.x = mouse_x - drag_offset_x
-            dragged_tile.y = mouse_y - drag_offset_y
-            dragged_tile.draw(screen, board.font)
-
-        pygame.display.flip()
-        clock.tick(30)
-
+            dragged_tile.snap_to(mouse_x - drag_offset_x, mouse_y - drag_offset_y)
+            renderer.set(*dragged_tile.sprite(atlas, highlighted=True), layer=DRAG_LAYER)
+        profiler.mark("tiles")
+
+        # Repaint only the regions that changed since the last frame
+        renderer.render(theme, viewport.key)
+        if game.log is not None:
+            game.log.flush()
+        scheduler.end_frame()
+        # The HUD names the file once a capture is written, so draw one more frame
+        saved = profiler.end_frame() is not None
+        if saved:
+            hud.show()
+        if exporter is not None:
+            exporter.maybe_export(scheduler, profiler)
+        if game.held is None and (status_snapshot is None or game.changed_since(status_snapshot)):
+            status_snapshot = game.snapshot()
+            if words is not None:
+                jobs.submit("status", board_status, status_snapshot)
+            jobs.submit("advice", dump_advice, status_snapshot, game.pool.letters, rarity)
+        busy = dragging or panning or animator.is_moving() or profiler.capture is not None or saved
+
+    jobs.shutdown()
+    if game.log is not None:
+        game.log.close()
     pygame.quit()
 
 
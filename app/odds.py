@@ -0,0 +1,134 @@
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from constants import VOWELS, VOWEL_TARGET, ODDS_CACHE_SIZE
+from engine import DUMP_DRAW_COUNT
+
+# Odds of a dump. The dumped tile goes back into the pool first, then
+# DUMP_DRAW_COUNT tiles are drawn without replacement, so every question is a
+# hypergeometric one over the exact per-letter counts left in the pool.
+
+Advice = namedtuple("Advice", "letter vowel_odds needed_odds needed scores")
+
+
+def falling(x, n):
+    # x * (x - 1) * ... * (x - n + 1): the count of ordered draws of n tiles
+    # from x, and 0 whenever x < n. Works elementwise on numpy arrays.
+    result = 1
+    for i in range(n):
+        result = result * (x - i)
+    return result
+
+
+class OddsTable:
+    # Everything for one pool state, for every possible dump letter d at once:
+    #   vowels[d][k]      P(exactly k vowels among the tiles drawn), k = 0..draw
+    #   any_of_each(S)[d] P(at least one tile from the letter set S)
+    def __init__(self, letters, counts, draw=DUMP_DRAW_COUNT):
+        self.letters = letters
+        self.index = {letter: i for i, letter in enumerate(letters)}
+        self.counts = counts
+        self.draw = draw
+        self.total = sum(counts) + 1  # the returned tile is back in the pool
+        if numpy is not None:
+            self.build_numpy()
+        else:
+            self.build_python()
+
+    def build_numpy(self):
+        draw = self.draw
+        self.array = numpy.array(self.counts, dtype=numpy.float64)
+        vowel = numpy.array([letter in VOWELS for letter in self.letters])
+        # vowels left once each letter d has been returned
+        vowels_after = self.array[vowel].sum() + vowel
+        self.vowels = numpy.stack([self.exact(vowels_after, k) for k in range(draw + 1)], axis=1)
+
+    def build_python(self):
+        draw = self.draw
+        vowels = sum(count for letter, count in zip(self.letters, self.counts) if letter in VOWELS)
+        self.vowels = []
+        for letter in self.letters:
+            vowels_after = vowels + (letter in VOWELS)
+            self.vowels.append([self.exact(vowels_after, k) for k in range(draw + 1)])
+
+    def exact(self, good, k):
+        # Hypergeometric P(exactly k of the drawn tiles come from `good`)
+        draw, total = self.draw, self.total
+        ways = falling(good, k) * falling(total - good, draw - k)
+        return ways * comb_factor(draw, k) / falling(total, draw)
+
+    def any_of_each(self, letters):
+        # P(at least one tile from the set `letters`), for every dump letter
+        draw, total = self.draw, self.total
+        if numpy is not None:
+            member = numpy.array([letter in letters for letter in self.letters])
+            good = self.array[member].sum() + member
+            return 1 - falling(total - good, draw) / falling(total, draw)
+        good = sum(count for letter, count in zip(self.letters, self.counts) if letter in letters)
+        return [1 - falling(total - good - (letter in letters), draw) / falling(total, draw)
+                for letter in self.letters]
+
+    def vowel_odds(self, dump):
+        # P(at least one vowel)
+        return 1 - float(self.vowels[self.index[dump]][0])
+
+
+def comb_factor(n, k):
+    # n! / (k! (n - k)!): orderings of k good tiles among n ordered draws
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+class DumpOdds:
+    # Builds OddsTables on demand and keeps the last few, keyed by the pool's
+    # counts: a table only changes when a draw or dump changes the pool.
+    def __init__(self, letters, cache_size=ODDS_CACHE_SIZE):
+        self.letters = letters
+        self.tables = OrderedDict()
+        self.cache_size = cache_size
+
+    def table(self, counts):
+        counts = tuple(counts)
+        table = self.tables.get(counts)
+        if table is not None:
+            self.tables.move_to_end(counts)
+            return table
+        table = self.tables[counts] = OddsTable(self.letters, counts)
+        if len(self.tables) > self.cache_size:
+            self.tables.popitem(last=False)
+        return table
+
+    def advise(self, counts, rack, needed=(), rarity=None):
+        # Scores each distinct rack letter as a dump: the chance of drawing
+        # something useful (a needed letter, or a vowel when the rack is short
+        # of them), plus a bonus for getting rid of a rare letter or a spare
+        # copy. needed holds letters the board is waiting for, best first.
+        if not rack or sum(counts) < DUMP_DRAW_COUNT:
+            return None
+        table = self.table(counts)
+        short_of_vowels = sum(letter in VOWELS for letter in rack) < VOWEL_TARGET * len(rack)
+        useful = set(needed) | (set(VOWELS) if short_of_vowels else set())
+        rarity = rarity or {}
+        useful_odds = table.any_of_each(useful) if useful else None
+        scores = {}
+        for letter in sorted(set(rack)):
+            score = float(useful_odds[table.index[letter]]) if useful else 0.0
+            score += rarity.get(letter, 0.0)
+            if rack.count(letter) > 1:
+                score += 0.25
+            scores[letter] = score
+        best = max(scores, key=scores.get)
+        needed_odds = float(table.any_of_each(set(needed))[table.index[best]]) if needed else None
+        return Advice(best, table.vowel_odds(best), needed_odds, list(needed), scores)
+
+
+def rarity_bonus(distribution):
+    # 0 for the most common letter up to 1 for the rarest
+    most = max(distribution.values())
+    return {letter: 1 - count / most for letter, count in distribution.items()}
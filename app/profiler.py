@@ -0,0 +1,174 @@
+import cProfile
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+
+from constants import *
+from scheduler import STATS_WINDOW
+from resources import get_font
+from util import setting_path, percentile
+
+# Phases in the order a frame runs them. background and grid are only paid
+# when the cached background layer is rebuilt (the dump area and reset button
+# are baked into it); compose is the dirty-rect blitting of the tiles.
+PHASES = ("events", "animation", "tiles", "widgets", "background", "grid", "compose", "flip")
+QUANTILES = {"p50": "0.5", "p99": "0.99"}  # phase_stats key -> Prometheus label
+
+
+class FrameProfiler:
+    # Splits each frame into PHASES with lap timing: start() at the top of the
+    # frame, mark(phase) after each piece of work charges the time since the
+    # previous mark to that phase.
+    def __init__(self, window=STATS_WINDOW):
+        self.times = {phase: deque(maxlen=window) for phase in PHASES}
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.last = None
+        self.capture = None
+        self.capture_frames = 0
+        self.saved = None  # path of the last capture written
+
+    def start(self):
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        if self.last is not None:
+            self.current[phase] += (now - self.last) * 1000
+        self.last = now
+
+    def end_frame(self):
+        for phase, ms in self.current.items():
+            self.times[phase].append(ms)
+            self.current[phase] = 0.0
+        self.last = None
+        if self.capture is not None:
+            self.capture_frames -= 1
+            if self.capture_frames <= 0:
+                return self.finish_capture()
+        return None
+
+    def phase_stats(self):
+        stats = {}
+        for phase, times in self.times.items():
+            times = sorted(times)
+            stats[phase] = {"p50": percentile(times, 0.5), "p99": percentile(times, 0.99)}
+        return stats
+
+    def start_capture(self, frames=PROFILE_FRAMES):
+        # cProfile the next frames; the stats file is written when they are done
+        if self.capture is not None:
+            return False
+        self.capture = cProfile.Profile()
+        self.capture_frames = frames
+        self.capture.enable()
+        return True
+
+    def finish_capture(self):
+        self.capture.disable()
+        directory = setting_path(None, "BANANA_PROFILE_DIR", PROFILE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"frames-{time.strftime('%Y%m%d-%H%M%S')}.pstats")
+        self.capture.dump_stats(path)
+        self.capture = None
+        self.saved = path
+        return path
+
+
+def snapshot(scheduler, profiler):
+    return {"time": time.time(), "scheduler": scheduler.stats(), "phases_ms": profiler.phase_stats()}
+
+
+def prometheus_text(metrics):
+    lines = []
+    for name, value in metrics["scheduler"].items():
+        kind = "counter" if name in ("frames", "idle_waits", "over_budget") else "gauge"
+        lines.append(f"# TYPE banana_{name} {kind}")
+        lines.append(f"banana_{name} {value}")
+    lines.append("# TYPE banana_phase_ms gauge")
+    for phase, stats in metrics["phases_ms"].items():
+        for quantile, value in stats.items():
+            lines.append(f'banana_phase_ms{{phase="{phase}",quantile="{QUANTILES[quantile]}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    # Rewrites path every interval seconds: Prometheus text format when the
+    # file ends in .prom, JSON otherwise. The file is replaced atomically so a
+    # scraper never reads half a write.
+    def __init__(self, path, interval=METRICS_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.next_export = 0.0
+
+    def maybe_export(self, scheduler, profiler):
+        now = time.monotonic()
+        if now < self.next_export:
+            return False
+        self.next_export = now + self.interval
+        self.export(snapshot(scheduler, profiler))
+        return True
+
+    def export(self, metrics):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        if self.path.endswith(".prom"):
+            data = prometheus_text(metrics)
+        else:
+            data = json.dumps(metrics, indent=2)
+        temp = self.path + ".tmp"
+        with open(temp, "w") as f:
+            f.write(data)
+        os.replace(temp, self.path)
+
+
+class ProfilerHud:
+    # Text overlay under the tile counter in the side panel. The surface is
+    # re-rendered at most every HUD_REFRESH_MS so the HUD doesn't become the
+    # thing it is measuring.
+    def __init__(self, scheduler, profiler):
+        self.scheduler = scheduler
+        self.profiler = profiler
+        self.visible = False
+        self.surface = None
+        self.rendered_at = 0
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.surface = None
+
+    def show(self):
+        self.visible = True
+        self.surface = None
+
+    def lines(self):
+        stats = self.scheduler.stats()
+        lines = [f"FPS {stats.get('fps', 0):.1f}",
+                 f"p50 {stats.get('work_ms_p50', 0):.2f} ms",
+                 f"p99 {stats.get('work_ms_p99', 0):.2f} ms",
+                 f"slow {stats['over_budget']}/{stats['frames']}"]
+        for phase, times in self.profiler.phase_stats().items():
+            lines.append(f"{phase} {times['p50']:.2f}/{times['p99']:.2f}")
+        if self.profiler.capture is not None:
+            lines.append(f"profiling {self.profiler.capture_frames}")
+        elif self.profiler.saved is not None:
+            lines.append(f"saved {os.path.basename(self.profiler.saved)}")
+        return lines
+
+    def render(self):
+        font = get_font(None, HUD_FONT_SIZE)
+        rendered = [font.render(line, True, POOL_TEXT_COLOR) for line in self.lines()]
+        height = font.get_linesize()
+        surface = pygame.Surface((SIDE_PANEL_WIDTH - 20, height * len(rendered)), pygame.SRCALPHA)
+        for i, text in enumerate(rendered):
+            surface.blit(text, (0, i * height))
+        return surface
+
+    def sprite(self):
+        now = pygame.time.get_ticks()
+        if self.surface is None or now - self.rendered_at >= HUD_REFRESH_MS:
+            self.surface = self.render()
+            self.rendered_at = now
+        return "hud", self.surface, (GRID_WIDTH * TILE_SIZE + 10, 150)
@@ -0,0 +1,95 @@
+from operator import itemgetter
+
+import pygame
+
+# Sprites are drawn in order of their layer, lowest first. Board tiles add
+# their cell to BOARD_LAYER so overlapping shadows stack row by row.
+BOARD_LAYER = (0,)
+RACK_LAYER = (1,)
+PANEL_LAYER = (2,)
+DRAG_LAYER = (3,)
+
+
+class DirtyRenderer:
+    # Retained-mode renderer: the views set() and remove() sprites when they
+    # change and the renderer keeps them between frames, so a frame only
+    # repaints the regions touched since the last one and an idle frame costs
+    # nothing however many tiles are on screen.
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.sprites = {}  # key -> (surface, rect, pos, layer)
+        self.entries = None  # sprites in draw order, rebuilt after a change
+        self.rects = None
+        self.dirty = []
+        self.full_repaint = True
+        self.profiler = None  # optional FrameProfiler, charged compose and flip
+
+    def invalidate(self, rect=None):
+        if rect is None:
+            self.full_repaint = True
+        else:
+            self.dirty.append(pygame.Rect(rect))
+
+    def set(self, key, surface, pos, clip=None, layer=PANEL_LAYER):
+        # A clipped sprite only ever paints inside its clip rect
+        rect = surface.get_rect(topleft=pos)
+        if clip is not None:
+            rect = rect.clip(clip)
+        previous = self.sprites.get(key)
+        if previous is not None:
+            if previous[0] is surface and previous[1] == rect and previous[2] == pos and previous[3] == layer:
+                return
+            self.dirty.append(previous[1])
+        self.sprites[key] = (surface, rect, pos, layer)
+        self.dirty.append(rect)
+        self.entries = None
+
+    def remove(self, key):
+        previous = self.sprites.pop(key, None)
+        if previous is not None:
+            self.dirty.append(previous[1])
+            self.entries = None
+
+    def merge_dirty(self):
+        merged = []
+        for rect in self.dirty:
+            rect = rect.clip(self.screen.get_rect())
+            if not rect.width or not rect.height:
+                continue
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        self.dirty = []
+        return merged
+
+    def render(self, theme, view_key=None):
+        if self.background.ensure(self.screen, theme, view_key):
+            self.full_repaint = True
+        if self.full_repaint:
+            self.dirty = []
+            regions = [self.screen.get_rect()]
+            self.full_repaint = False
+        else:
+            regions = self.merge_dirty()
+        if not regions:
+            return []
+
+        if self.entries is None:
+            self.entries = sorted(self.sprites.values(), key=itemgetter(3))
+            self.rects = [entry[1] for entry in self.entries]
+        for region in regions:
+            self.screen.set_clip(region)
+            self.screen.blit(self.background.surface, region, region)
+            for index in region.collidelistall(self.rects):
+                surface, rect, pos, _ = self.entries[index]
+                self.screen.blit(surface, rect, rect.move(-pos[0], -pos[1]))
+        self.screen.set_clip(None)
+        if self.profiler is not None:
+            self.profiler.mark("compose")
+        pygame.display.update(regions)
+        if self.profiler is not None:
+            self.profiler.mark("flip")
+        return regions
@@ -0,0 +1,43 @@
+import argparse
+import time
+
+from engine import Game
+from eventlog import EventLog, OPCODES, state_digest
+
+
+def replay(log, verify=False):
+    # Re-executes every recorded action; with verify, compares the state
+    # after each step against the digest stored in the log
+    game = Game(log.seed, log.distribution, log.rack_size, log.sets)
+    steps = 0
+    for opcode, args, digest in log.records():
+        getattr(game, OPCODES[opcode][0])(*args)
+        if verify and digest is not None and state_digest(game) != digest:
+            name = OPCODES[opcode][0]
+            raise ValueError(f"state diverged at step {steps} ({name}{tuple(args)})")
+        steps += 1
+    return game, steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded game log without a display.")
+    parser.add_argument("log", help="path to a .bnlg file")
+    parser.add_argument("--verify", action="store_true", help="check the state digest after every step")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the log this many times (for benchmarking)")
+    args = parser.parse_args()
+
+    log = EventLog.load(args.log)
+    if args.verify and not log.digests:
+        print("log has no state digests; replaying without verification")
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        game, steps = replay(log, args.verify)
+    elapsed = time.perf_counter() - start
+    print(f"seed {log.seed}: {steps} actions, {len(game.board)} tiles on the board, "
+          f"{len(game.rack)} in the rack, {len(game.pool)} in the pool")
+    total = steps * args.repeat
+    print(f"replayed {total} actions in {elapsed:.3f}s ({total / elapsed:,.0f} actions/s)" if elapsed else "")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+import pygame
+
+from constants import *
+
+
+class ResourceCache:
+    # Fonts are loaded the first time a widget asks for them, once per
+    # (face, size). Rendered labels are kept in an LRU keyed by everything
+    # that affects their pixels, so constant text is rendered once.
+    def __init__(self, text_capacity=TEXT_CACHE_SIZE):
+        self.fonts = {}
+        self.texts = OrderedDict()
+        self.text_capacity = text_capacity
+
+    def font(self, face=None, size=FONT_SIZE):
+        key = (face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(face, size)
+        return font
+
+    def text(self, string, color, face=None, size=FONT_SIZE, antialias=True):
+        key = (string, tuple(color), face, size, antialias)
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            return surface
+        surface = self.font(face, size).render(string, antialias, color)
+        self.texts[key] = surface
+        if len(self.texts) > self.text_capacity:
+            self.texts.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.fonts.clear()
+        self.texts.clear()
+
+
+_shared = None
+
+
+def shared_resources():
+    global _shared
+    if _shared is None:
+        _shared = ResourceCache()
+    return _shared
+
+
+def get_font(face=None, size=FONT_SIZE):
+    return shared_resources().font(face, size)
+
+
+def render_text(string, color, face=None, size=FONT_SIZE):
+    return shared_resources().text(string, color, face, size)
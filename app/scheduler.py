@@ -0,0 +1,69 @@
+import time
+from collections import deque
+
+import pygame
+
+from constants import ACTIVE_FPS, IDLE_TIMEOUT_MS
+
+STATS_WINDOW = 300  # frames kept for the rolling statistics
+
+
+class FrameScheduler:
+    # Runs the loop at active_fps while something is moving or being dragged
+    # and otherwise blocks in pygame.event.wait until input arrives, so an
+    # idle window costs next to no CPU.
+    def __init__(self, active_fps=ACTIVE_FPS, idle_timeout_ms=IDLE_TIMEOUT_MS):
+        self.active_fps = active_fps
+        self.idle_timeout_ms = idle_timeout_ms
+        self.clock = pygame.time.Clock()
+        self.frame_start = None
+        self.dt = 1000 / active_fps
+        self.work_times = deque(maxlen=STATS_WINDOW)
+        self.frames = 0
+        self.idle_waits = 0
+        self.over_budget = 0
+
+    @property
+    def budget_ms(self):
+        return 1000 / self.active_fps
+
+    def wait(self, busy):
+        # Returns this frame's events; dt is the time to simulate, in ms
+        if busy:
+            self.dt = self.clock.tick(self.active_fps)
+            events = pygame.event.get()
+        else:
+            self.idle_waits += 1
+            first = pygame.event.wait(self.idle_timeout_ms)
+            events = [] if first.type == pygame.NOEVENT else [first]
+            events.extend(pygame.event.get())
+            # Time spent asleep is not animation time
+            self.clock.tick()
+            self.dt = self.budget_ms
+        self.frame_start = time.perf_counter()
+        return events
+
+    def end_frame(self):
+        if self.frame_start is None:
+            return
+        work = (time.perf_counter() - self.frame_start) * 1000
+        self.work_times.append(work)
+        self.frames += 1
+        if work > self.budget_ms:
+            self.over_budget += 1
+
+    def stats(self):
+        times = sorted(self.work_times)
+        if not times:
+            return {"frames": self.frames, "idle_waits": self.idle_waits, "over_budget": self.over_budget}
+        return {
+            "frames": self.frames,
+            "idle_waits": self.idle_waits,
+            "over_budget": self.over_budget,
+            "budget_ms": self.budget_ms,
+            "fps": self.clock.get_fps(),
+            "work_ms_avg": sum(times) / len(times),
+            "work_ms_p50": times[len(times) // 2],
+            "work_ms_p99": times[min(len(times) - 1, len(times) * 99 // 100)],
+            "work_ms_max": times[-1],
+        }
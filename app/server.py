@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import json
+import os
+import pickle
+import secrets
+import signal
+import time
+from collections import OrderedDict
+
+from constants import (SERVER_HOST, SERVER_PORT, SESSION_DIR, SESSION_IDLE_SECONDS, SESSION_SWEEP_SECONDS,
+                       SESSION_MAX_RACK, SESSION_MAX_SETS)
+from engine import Game, OPENING_RACK_SIZE
+from util import setting_path
+
+# Hosts many solitaire games in one process, for bots and web frontends. The
+# protocol is JSON lines over TCP or a Unix socket: every request is an object
+# with an "op", the "session" it applies to (except for "new"), the op's
+# arguments and an optional "id" that is echoed back. Every reply has "ok"
+# and either "error", or the op's "result" plus the session's "rack" and
+# "pool" (tiles left) so a client never has to ask for them separately.
+#
+#   {"op": "new", "seed": 7}                   result: {"session": "..."}
+#   {"op": "place", "session": s, "index": 0, "row": 8, "col": 8}
+#   {"op": "move", "session": s, "row": 8, "col": 8, "to_row": 9, "to_col": 8}
+#   {"op": "remove", "session": s, "row": 9, "col": 8}
+#   {"op": "dump", "session": s, "index": 3}
+#   {"op": "draw", "session": s}              once the rack is empty
+#   {"op": "reset", "session": s}
+#   {"op": "state", "session": s}             result: [[row, col, letter], ...]
+#   {"op": "close", "session": s}
+
+# op -> (Game method, argument names)
+OPS = {
+    "place": ("play", ("index", "row", "col")),
+    "move": ("move", ("row", "col", "to_row", "to_col")),
+    "remove": ("take", ("row", "col")),
+    "dump": ("dump_from_rack", ("index",)),
+    "draw": ("peel", ()),
+    "reset": ("reset", ()),
+}
+
+
+def arguments(request, names):
+    try:
+        return [int(request[name]) for name in names]
+    except KeyError as error:
+        raise ValueError(f"missing argument {error.args[0]!r}") from None
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{', '.join(names)} must be {'an integer' if len(names) == 1 else 'integers'}") from None
+
+
+def optional(request, name, default):
+    return arguments(request, (name,))[0] if request.get(name) is not None else default
+
+
+class Session:
+    __slots__ = ("game", "last_used")
+
+    def __init__(self, game):
+        self.game = game
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    # Live sessions, least recently used first. Sessions idle for longer than
+    # idle_seconds are pickled into directory (the game's rules and a
+    # snapshot) and dropped; their next request loads them back. Games keep
+    # no undo history, so a session costs little more than its board chunks
+    # and its pool's random state.
+    def __init__(self, directory, idle_seconds=SESSION_IDLE_SECONDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.idle_seconds = idle_seconds
+        self.sessions = OrderedDict()
+        self.saving = {}  # id -> pickled session, while a sweep writes it out
+        self.evicted = 0
+        self.restored = 0
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def path(self, session_id):
+        if not isinstance(session_id, str) or not session_id.isalnum():
+            raise ValueError(f"bad session id {session_id!r}")
+        return os.path.join(self.directory, f"{session_id}.session")
+
+    def create(self, seed=None, rack_size=OPENING_RACK_SIZE, sets=1):
+        if not 0 <= rack_size <= SESSION_MAX_RACK or not 1 <= sets <= SESSION_MAX_SETS:
+            raise ValueError(f"rack_size must be 0 to {SESSION_MAX_RACK} and sets 1 to {SESSION_MAX_SETS}")
+        session_id = secrets.token_hex(8)
+        self.sessions[session_id] = Session(Game(seed, rack_size=rack_size, sets=sets, history=False))
+        return session_id
+
+    def get(self, session_id):
+        session = self.sessions.get(session_id) if isinstance(session_id, str) else None
+        if session is None:
+            session = self.sessions[session_id] = Session(self.load(session_id))
+            self.restored += 1
+        else:
+            self.sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+        return session.game
+
+    def load(self, session_id):
+        data = self.saving.pop(session_id, None)
+        if data is None:
+            try:
+                with open(self.path(session_id), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                raise ValueError(f"no session {session_id!r}") from None
+        seed, distribution, rack_size, sets, snapshot = pickle.loads(data)
+        game = Game(seed, distribution, rack_size, sets, history=False)
+        game.restore(snapshot)
+        return game
+
+    def close(self, session_id):
+        path = self.path(session_id)
+        found = self.sessions.pop(session_id, None) is not None or self.saving.pop(session_id, None) is not None
+        if os.path.exists(path):
+            os.remove(path)
+            found = True
+        if not found:
+            raise ValueError(f"no session {session_id!r}")
+
+    @staticmethod
+    def dump(game):
+        return pickle.dumps((game.seed, game.distribution, game.rack_size, game.sets, game.snapshot()),
+                            pickle.HIGHEST_PROTOCOL)
+
+    def write(self, batch):
+        for session_id, data in batch.items():
+            path = self.path(session_id)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+
+    async def evict_idle(self):
+        # Pickling happens here on the loop; the file writes go to a thread
+        cutoff = time.monotonic() - self.idle_seconds
+        batch = {}
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_used > cutoff:
+                break
+            del self.sessions[session_id]
+            batch[session_id] = self.saving[session_id] = self.dump(session.game)
+        if not batch:
+            return
+        await asyncio.to_thread(self.write, batch)
+        for session_id, data in batch.items():
+            if self.saving.get(session_id) is data:
+                del self.saving[session_id]
+            elif session_id not in self.sessions and session_id not in self.saving:
+                # closed while its file was being written
+                path = self.path(session_id)
+                if os.path.exists(path):
+                    os.remove(path)
+        self.evicted += len(batch)
+
+    def save_all(self):
+        batch = dict(self.saving)
+        batch.update((session_id, self.dump(session.game)) for session_id, session in self.sessions.items())
+        self.write(batch)
+        return len(batch)
+
+
+class SessionServer:
+    def __init__(self, store):
+        self.store = store
+        self.requests = 0
+
+    def execute(self, request):
+        op = request.get("op")
+        if op == "new":
+            session_id = self.store.create(optional(request, "seed", None),
+                                           optional(request, "rack_size", OPENING_RACK_SIZE),
+                                           optional(request, "sets", 1))
+            game, result = self.store.get(session_id), {"session": session_id}
+        elif op == "close":
+            self.store.close(request.get("session"))
+            return {"ok": True, "result": None}
+        elif op == "state":
+            game = self.store.get(request.get("session"))
+            result = [[row, col, game.board.get(row, col)] for row, col in game.board.occupied_cells()]
+        elif op in OPS:
+            method, names = OPS[op]
+            args = arguments(request, names)
+            game = self.store.get(request.get("session"))
+            result = getattr(game, method)(*args)
+        else:
+            raise ValueError(f"unknown op {op!r}; expected new, close, state or one of {', '.join(OPS)}")
+        return {"ok": True, "result": result, "rack": "".join(game.rack.letters), "pool": len(game.pool)}
+
+    async def serve_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    reply = self.execute(request)
+                except ValueError as error:  # json.JSONDecodeError included
+                    reply = {"ok": False, "error": str(error)}
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                self.requests += 1
+                writer.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError):  # ValueError: a line over the reader's limit
+            pass
+        finally:
+            writer.close()
+
+    async def sweep(self, interval=SESSION_SWEEP_SECONDS):
+        while True:
+            await asyncio.sleep(interval)
+            await self.store.evict_idle()
+
+
+async def serve(server, host, port, unix):
+    if unix:
+        listener = await asyncio.start_unix_server(server.serve_client, unix)
+        where = unix
+    else:
+        listener = await asyncio.start_server(server.serve_client, host, port)
+        where = ", ".join(f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in listener.sockets)
+    print(f"serving sessions on {where}", flush=True)
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+    sweeper = asyncio.create_task(server.sweep())
+    async with listener:
+        await stop.wait()
+    sweeper.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve solitaire game sessions as JSON lines over a socket.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--session-dir", help=f"where idle sessions are kept (default app/{SESSION_DIR})")
+    parser.add_argument("--idle", type=float, default=SESSION_IDLE_SECONDS,
+                        help="seconds without a request before a session is moved to disk")
+    args = parser.parse_args()
+
+    server = SessionServer(SessionStore(setting_path(args.session_dir, "BANANA_SESSION_DIR", SESSION_DIR), args.idle))
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    finally:
+        saved = server.store.save_all()
+        print(f"{server.requests} requests served; {saved} sessions saved to {server.store.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import time
+from collections import Counter
+
+from constants import MIN_WORD_LENGTH, GRID_WIDTH, GRID_HEIGHT
+
+ACROSS = (0, 1)
+DOWN = (1, 0)
+WORDS_KEY = None  # trie slot holding the words spelled by a node's key
+BRANCHING = 6  # best moves tried at each level of the search
+
+
+class AnagramIndex:
+    # Words grouped by their sorted letters, with the keys stored in a trie so
+    # every word buildable from a rack is found by walking the trie once
+    # instead of permuting the rack.
+    def __init__(self, words):
+        self.trie = {}
+        for word in words:
+            if len(word) < MIN_WORD_LENGTH:
+                continue
+            node = self.trie
+            for letter in sorted(word):
+                node = node.setdefault(letter, {})
+            node.setdefault(WORDS_KEY, []).append(word)
+
+    def lookup(self, letters):
+        node = self.trie
+        for letter in sorted(letters):
+            node = node.get(letter)
+            if node is None:
+                return []
+        return node.get(WORDS_KEY, [])
+
+    def buildable(self, counts, required=None):
+        # Words whose letters are a sub-multiset of counts, longest first. If
+        # required is given every word must use that letter at least once.
+        found = []
+        self.walk(self.trie, counts, required, False, 0, found)
+        found.sort(key=lambda item: -item[0])
+        return [word for _, word in found]
+
+    def walk(self, node, counts, required, used_required, depth, found):
+        if (required is None or used_required) and WORDS_KEY in node:
+            found.extend((depth, word) for word in node[WORDS_KEY])
+        for letter, child in node.items():
+            if letter is WORDS_KEY or not counts.get(letter):
+                continue
+            counts[letter] -= 1
+            self.walk(child, counts, required, used_required or letter == required, depth + 1, found)
+            counts[letter] += 1
+
+
+class Solution:
+    def __init__(self, placements=(), complete=True):
+        self.placements = list(placements)  # [(row, col, letter)] for new tiles
+        self.complete = complete  # False if the time budget ran out
+
+    def __len__(self):
+        return len(self.placements)
+
+
+class Solver:
+    def __init__(self, words, index=None):
+        self.words = words
+        self.index = index if index is not None else AnagramIndex(words)
+
+    def solve(self, board, rack_letters, time_budget=0.5, origin=(GRID_HEIGHT // 2, GRID_WIDTH // 2)):
+        # origin is where an opening word is centred when the board is empty
+        self.board = board
+        self.origin = origin
+        self.grid = {cell: board.get(*cell) for cell in board.occupied_cells()}
+        self.deadline = time.perf_counter() + time_budget
+        self.best = []
+        self.timed_out = False
+        counts = Counter(rack_letters)
+        if self.grid:
+            self.search(counts, [])
+        else:
+            self.open(counts)
+        return Solution(self.best, not self.timed_out)
+
+    def open(self, counts):
+        row, centre = self.origin
+        for word in self.index.buildable(counts)[:BRANCHING]:
+            col = centre - (len(word) + 1) // 2
+            placed = [(row, col + i, letter) for i, letter in enumerate(word)]
+            self.apply(placed, counts)
+            self.search(counts, placed)
+            self.undo(placed, counts)
+            if self.out_of_time():
+                return
+
+    def search(self, counts, placed):
+        if len(placed) > len(self.best):
+            self.best = list(placed)
+        remaining = sum(counts.values())
+        if not remaining or len(placed) + remaining <= len(self.best) or self.out_of_time():
+            return
+        for move in self.moves(counts)[:BRANCHING]:
+            self.apply(move, counts)
+            placed.extend(move)
+            self.search(counts, placed)
+            del placed[len(placed) - len(move):]
+            self.undo(move, counts)
+            if self.out_of_time() or not sum(counts.values()):
+                return
+
+    def moves(self, counts):
+        moves = []
+        seen = set()
+        buildable = {}
+        self.crossings = {}  # the grid is fixed until the next apply
+        for (row, col), letter in list(self.grid.items()):
+            if self.out_of_time():
+                break
+            for direction in (ACROSS, DOWN):
+                dr, dc = direction
+                # Only cross an existing tile that has no neighbours along
+                # the new word's direction
+                if (row - dr, col - dc) in self.grid or (row + dr, col + dc) in self.grid:
+                    continue
+                if letter not in buildable:
+                    # The crossed tile is already on the board, so words
+                    # through it may use one more copy than the rack holds
+                    with_board = Counter(counts)
+                    with_board[letter] += 1
+                    buildable[letter] = self.index.buildable(with_board, letter)
+                for word in buildable[letter]:
+                    if self.out_of_time():
+                        break
+                    for i, word_letter in enumerate(word):
+                        if word_letter != letter:
+                            continue
+                        start = (row - dr * i, col - dc * i)
+                        move = self.fit(word, start, direction, counts)
+                        if move:
+                            key = tuple(move)
+                            if key not in seen:
+                                seen.add(key)
+                                moves.append(move)
+        moves.sort(key=lambda move: -len(move))
+        return moves
+
+    def fit(self, word, start, direction, counts):
+        dr, dc = direction
+        row, col = start
+        end = (row + dr * len(word), col + dc * len(word))
+        if (row - dr, col - dc) in self.grid or end in self.grid:
+            return None
+        move = []
+        needed = {}
+        for i, letter in enumerate(word):
+            cell = (row + dr * i, col + dc * i)
+            existing = self.grid.get(cell)
+            if existing is not None:
+                if existing != letter:
+                    return None
+                continue
+            needed[letter] = needed.get(letter, 0) + 1
+            if needed[letter] > counts.get(letter, 0):
+                return None
+            if not self.cross_word_ok(cell, letter, (dc, dr)):
+                return None
+            move.append((cell[0], cell[1], letter))
+        return move or None
+
+    def cross_word_ok(self, cell, letter, direction):
+        key = (cell, letter, direction)
+        ok = self.crossings.get(key)
+        if ok is None:
+            ok = self.crossings[key] = self.check_cross_word(cell, letter, direction)
+        return ok
+
+    def check_cross_word(self, cell, letter, direction):
+        dr, dc = direction
+        row, col = cell
+        before = []
+        r, c = row - dr, col - dc
+        while (r, c) in self.grid:
+            before.append(self.grid[(r, c)])
+            r, c = r - dr, c - dc
+        after = []
+        r, c = row + dr, col + dc
+        while (r, c) in self.grid:
+            after.append(self.grid[(r, c)])
+            r, c = r + dr, c + dc
+        if not before and not after:
+            return True
+        return "".join(reversed(before)) + letter + "".join(after) in self.words
+
+    def apply(self, move, counts):
+        for row, col, letter in move:
+            self.grid[(row, col)] = letter
+            counts[letter] -= 1
+
+    def undo(self, move, counts):
+        for row, col, letter in move:
+            del self.grid[(row, col)]
+            counts[letter] += 1
+
+    def out_of_time(self):
+        if not self.timed_out and time.perf_counter() > self.deadline:
+            self.timed_out = True
+        return self.timed_out
+
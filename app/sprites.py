@@ -0,0 +1,52 @@
+import pygame
+
+from constants import *
+from resources import get_font
+
+
+class TileAtlas:
+    # Complete tile images (shadow, body, border and glyph) rendered once per
+    # letter, so drawing a tile is a single blit.
+    def __init__(self, font_face=None, font_size=FONT_SIZE, tile_size=TILE_SIZE):
+        self.font_face = font_face
+        self.font_size = font_size
+        self.tile_size = tile_size
+        self.sprites = {}
+
+    @property
+    def font(self):
+        # Loaded with the first sprite rather than when the atlas is created
+        return get_font(self.font_face, self.font_size)
+
+    def render(self, letter, highlighted, invalid):
+        size = self.tile_size
+        offset = TILE_SHADOW_OFFSET
+        sprite = pygame.Surface((size + offset, size + offset), pygame.SRCALPHA)
+        body_color = TILE_HIGHLIGHT_COLOR if highlighted else TILE_INVALID_COLOR if invalid else TILE_COLOR
+        border_width = 3 if highlighted else 2
+        pygame.draw.rect(sprite, TILE_SHADOW_COLOR, (offset, offset, size, size), border_radius=TILE_BORDER_RADIUS)
+        pygame.draw.rect(sprite, body_color, (0, 0, size, size), border_radius=TILE_BORDER_RADIUS)
+        pygame.draw.rect(sprite, TILE_BORDER_COLOR, (0, 0, size, size), border_width, border_radius=TILE_BORDER_RADIUS)
+        text = self.font.render(letter, True, TEXT_COLOR)
+        sprite.blit(text, text.get_rect(center=(size // 2, size // 2)))
+        if pygame.display.get_surface():
+            sprite = sprite.convert_alpha()
+        return sprite
+
+    def get(self, letter, highlighted=False, invalid=False):
+        key = (letter, highlighted, invalid)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = self.render(letter, highlighted, invalid)
+        return sprite
+
+
+_atlases = {}
+
+
+def get_tile_atlas(font_face=None, font_size=FONT_SIZE, tile_size=TILE_SIZE):
+    key = (font_face, font_size, tile_size)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = TileAtlas(font_face, font_size, tile_size)
+    return atlas
@@ -0,0 +1,276 @@
+import argparse
+import csv
+import importlib
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # results fall back to CSV
+    pyarrow = None
+
+from constants import LETTER_DISTRIBUTION
+from engine import Game, OPENING_RACK_SIZE, DUMP_DRAW_COUNT
+from solver import Solver
+from words import load_words, word_list_path
+
+# Self-play: every game is dealt from its own seed and played to the end by a
+# strategy, with results streamed to a file as workers finish them.
+
+MAX_TURNS = 500  # a game that hasn't ended by now counts as stuck
+STRATEGY_TIME_BUDGET = 0.05  # solver seconds per turn
+FLUSH_ROWS = 1000
+REPORT_EVERY = 1000
+COLUMNS = ("seed", "finished", "turns", "moves", "dumps", "peels", "tiles_placed", "tiles_consumed",
+           "rack_left", "pool_left", "seconds", "ms_per_move", "max_move_ms")
+STAT_COLUMNS = ("finished", "turns", "dumps", "tiles_placed", "tiles_consumed", "seconds", "ms_per_move")
+
+
+class GreedyStrategy:
+    # Lays out whatever the solver finds; when it finds nothing, dumps the
+    # rack's rarest letter while the pool can pay for it
+    dumps = True
+
+    def __init__(self, words, time_budget=STRATEGY_TIME_BUDGET):
+        self.solver = Solver(words)
+        self.time_budget = time_budget
+
+    def turn(self, game):
+        # True if the turn changed the game; False means the strategy is stuck
+        solution = self.solver.solve(game.board, game.rack.letters, self.time_budget)
+        placed = 0
+        for row, col, letter in solution.placements:
+            if game.play(game.rack.letters.index(letter), row, col) == (row, col):
+                placed += 1
+        if placed:
+            return True
+        if self.dumps and len(game.pool) >= DUMP_DRAW_COUNT:
+            letter = min(game.rack.letters, key=lambda letter: game.distribution.get(letter, 0))
+            return game.dump_from_rack(game.rack.letters.index(letter)) is not None
+        return False
+
+
+class NoDumpStrategy(GreedyStrategy):
+    dumps = False
+
+
+STRATEGIES = {"greedy": GreedyStrategy, "nodump": NoDumpStrategy}
+
+
+def load_strategy(spec):
+    # A name from STRATEGIES or "module:attribute" for a class taking the
+    # word list and a per-turn time budget and providing turn(game)
+    if spec in STRATEGIES:
+        return STRATEGIES[spec]
+    module, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"unknown strategy {spec!r}; use one of {sorted(STRATEGIES)} or module:attribute")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def play_game(seed, strategy, distribution=LETTER_DISTRIBUTION, rack_size=OPENING_RACK_SIZE, sets=1):
+    game = Game(seed, distribution, rack_size, sets, history=False)
+    total = len(game.pool) + len(game.rack)
+    turns = moves = dumps = peels = 0
+    move_times = []
+    start = time.perf_counter()
+    while turns < MAX_TURNS:
+        if not game.rack.letters:
+            if game.peel() is None:
+                break  # rack and pool both empty: the game is won
+            peels += 1
+            continue
+        pool_before = len(game.pool)
+        move_start = time.perf_counter()
+        progressed = strategy.turn(game)
+        move_times.append(time.perf_counter() - move_start)
+        turns += 1
+        if not progressed:
+            break
+        if len(game.pool) < pool_before:
+            dumps += 1
+        else:
+            moves += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "seed": seed,
+        "finished": not game.rack.letters and not len(game.pool),
+        "turns": turns,
+        "moves": moves,
+        "dumps": dumps,
+        "peels": peels,
+        "tiles_placed": len(game.board),
+        "tiles_consumed": total - len(game.pool),
+        "rack_left": len(game.rack),
+        "pool_left": len(game.pool),
+        "seconds": elapsed,
+        "ms_per_move": sum(move_times) * 1000 / len(move_times) if move_times else 0.0,
+        "max_move_ms": max(move_times) * 1000 if move_times else 0.0,
+    }
+
+
+# Worker state, set once per process by init_worker
+_strategy = None
+_rules = None
+
+
+def init_worker(words_path, strategy_spec, time_budget, rules):
+    global _strategy, _rules
+    words = load_words(words_path)
+    if words is None:
+        raise ValueError(f"no word list at {words_path}")
+    _strategy = load_strategy(strategy_spec)(words, time_budget)
+    _rules = rules
+
+
+def play_seed(seed):
+    return play_game(seed, _strategy, **_rules)
+
+
+class RunningStats:
+    # Welford's online mean and variance, so aggregates never need the rows
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.low = math.inf
+        self.high = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class ParquetSink:
+    def __init__(self, path):
+        self.writer = None
+        self.path = path
+
+    def write(self, rows):
+        table = pyarrow.Table.from_pylist(rows)
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.file, COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def open_sink(path):
+    if path.endswith(".parquet"):
+        if pyarrow is None:
+            raise ValueError("writing .parquet needs pyarrow; install it or use a .csv path")
+        return ParquetSink(path)
+    return CsvSink(path)
+
+
+def parse_letters(spec):
+    # "E=20,Q=1" overrides those letters' counts; 0 removes a letter
+    distribution = dict(LETTER_DISTRIBUTION)
+    for item in filter(None, spec.split(",")):
+        letter, _, count = item.partition("=")
+        letter = letter.strip().upper()
+        if len(letter) != 1 or not letter.isalpha() or not count.strip().isdigit():
+            raise ValueError(f"bad letter count {item!r}; expected e.g. E=20")
+        distribution[letter] = int(count)
+    return {letter: count for letter, count in distribution.items() if count}
+
+
+def run(games, seed, workers, strategy, time_budget, words_path, rules, out):
+    stats = {column: RunningStats() for column in STAT_COLUMNS}
+    sink = open_sink(out)
+    rows = []
+    start = time.perf_counter()
+    seeds = range(seed, seed + games)
+    if workers == 1:
+        init_worker(words_path, strategy, time_budget, rules)
+        results = map(play_seed, seeds)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, init_worker, (words_path, strategy, time_budget, rules))
+        results = pool.imap_unordered(play_seed, seeds, chunksize=max(1, min(64, games // (workers * 16))))
+    try:
+        for done, row in enumerate(results, 1):
+            rows.append(row)
+            for column, column_stats in stats.items():
+                column_stats.add(float(row[column]))
+            if len(rows) >= FLUSH_ROWS:
+                sink.write(rows)
+                rows = []
+            if done % REPORT_EVERY == 0 or done == games:
+                elapsed = time.perf_counter() - start
+                print(f"{done}/{games} games, {stats['finished'].mean:.1%} finished, "
+                      f"{stats['tiles_consumed'].mean:.1f} tiles consumed, {stats['dumps'].mean:.2f} dumps, "
+                      f"{done / elapsed:,.1f} games/s", flush=True)
+        if rows:
+            sink.write(rows)
+    finally:
+        sink.close()
+        if pool is not None:
+            pool.terminate()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many seeded solitaire games with a strategy.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="first seed; game i uses seed + i")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--strategy", default="greedy", help=f"{', '.join(STRATEGIES)} or module:Class")
+    parser.add_argument("--time-budget", type=float, default=STRATEGY_TIME_BUDGET,
+                        help="solver seconds per turn; more finishes more games but plays fewer per second")
+    parser.add_argument("--words", help="word list or compiled .dawg (defaults to the game's)")
+    parser.add_argument("--rack-size", type=int, default=OPENING_RACK_SIZE)
+    parser.add_argument("--sets", type=int, default=1, help="copies of the letter distribution in the pool")
+    parser.add_argument("--letters", default="", help="override letter counts, e.g. E=20,Q=1")
+    parser.add_argument("--out", help="results file, .parquet (needs pyarrow) or .csv")
+    args = parser.parse_args()
+
+    words_path = word_list_path(args.words)
+    out = args.out or ("tournament.parquet" if pyarrow is not None else "tournament.csv")
+    try:
+        rules = {"distribution": parse_letters(args.letters), "rack_size": args.rack_size, "sets": args.sets}
+        # Fail before creating the results file: a worker pool would keep
+        # restarting workers whose initializer raises
+        load_strategy(args.strategy)
+        if load_words(words_path) is None:
+            raise ValueError(f"no word list at {words_path}")
+        stats = run(args.games, args.seed, args.workers, args.strategy, args.time_budget, words_path, rules, out)
+    except ValueError as error:
+        sys.exit(str(error))
+    print(f"\nresults written to {out}")
+    print(f"{'':16} {'mean':>10} {'std':>10} {'min':>10} {'max':>10}")
+    for column, column_stats in stats.items():
+        print(f"{column:16} {column_stats.mean:10.3f} {column_stats.std:10.3f} "
+              f"{column_stats.low:10.3f} {column_stats.high:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
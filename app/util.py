@@ -0,0 +1,22 @@
+import os
+
+# Small helpers shared by the game, the tools and the benchmarks; nothing in
+# here may import pygame.
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def setting_path(path, env, default):
+    # path if given, else the env variable, else default; relative paths are
+    # taken from the game's directory. An empty value comes back as is, for
+    # settings where that means "off".
+    if path is None:
+        path = os.environ.get(env, default)
+    if path and not os.path.isabs(path):
+        path = os.path.join(APP_DIR, path)
+    return path
+
+
+def percentile(times, fraction):
+    # times must be sorted
+    return times[min(len(times) - 1, int(len(times) * fraction))] if times else 0.0
@@ -0,0 +1,83 @@
+from collections import Counter
+
+from constants import MIN_WORD_LENGTH
+
+ACROSS = (0, 1)
+DOWN = (1, 0)
+
+
+class WordValidator:
+    # Keeps every run of two or more tiles checked against the word index.
+    # A change to one cell only re-reads the across and down runs through that
+    # cell and its neighbours, so a move costs the same on a full board as on
+    # an empty one.
+    def __init__(self, board, words):
+        self.board = board
+        self.words = words
+        self.runs = {}  # (direction, start cell) -> (cells, word, valid)
+        self.cell_runs = {}  # (direction, cell) -> start cell of its run
+        self.invalid_cells = Counter()
+        board.listeners.append(self.update)
+
+    def update(self, row, col):
+        for direction in (ACROSS, DOWN):
+            dr, dc = direction
+            cells = ((row - dr, col - dc), (row, col), (row + dr, col + dc))
+            for cell in cells:
+                self.drop_run(direction, cell)
+            for cell in cells:
+                if (direction, cell) not in self.cell_runs and self.board.get(*cell) is not None:
+                    self.add_run(direction, cell)
+
+    def drop_run(self, direction, cell):
+        start = self.cell_runs.get((direction, cell))
+        if start is None:
+            return
+        cells, _, valid = self.runs.pop((direction, start))
+        for run_cell in cells:
+            del self.cell_runs[(direction, run_cell)]
+            if not valid:
+                self.invalid_cells[run_cell] -= 1
+                if not self.invalid_cells[run_cell]:
+                    del self.invalid_cells[run_cell]
+
+    def add_run(self, direction, cell):
+        dr, dc = direction
+        row, col = cell
+        while self.board.get(row - dr, col - dc) is not None:
+            row, col = row - dr, col - dc
+        cells = []
+        letters = []
+        while True:
+            letter = self.board.get(row, col)
+            if letter is None:
+                break
+            cells.append((row, col))
+            letters.append(letter)
+            row, col = row + dr, col + dc
+        # A restore reports several cells at once, after all of them changed,
+        # so runs recorded from the old board can overlap this one
+        for run_cell in cells:
+            self.drop_run(direction, run_cell)
+        if len(cells) < MIN_WORD_LENGTH:
+            return
+        word = "".join(letters)
+        valid = word in self.words
+        self.runs[(direction, cells[0])] = (tuple(cells), word, valid)
+        for run_cell in cells:
+            self.cell_runs[(direction, run_cell)] = cells[0]
+            if not valid:
+                self.invalid_cells[run_cell] += 1
+
+    def is_invalid(self, row, col):
+        return (row, col) in self.invalid_cells
+
+    def invalid_words(self):
+        return [word for _, word, valid in self.runs.values() if not valid]
+
+    def all_valid(self):
+        return not self.invalid_cells
+
+    def is_solved(self):
+        # Every run is a word and all tiles form one connected group
+        return not self.invalid_cells and self.board.is_connected()
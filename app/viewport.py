@@ -0,0 +1,66 @@
+import pygame
+
+from constants import TILE_SIZE, FONT_SIZE
+
+ZOOM_LEVELS = (20, 25, 30, 40, 50, 60, 75)  # on-screen tile sizes in pixels
+
+
+class Viewport:
+    # Maps the unbounded board onto a fixed rectangle of the window. origin is
+    # the board-space pixel (at the current tile size) shown at the rect's
+    # top-left corner, so cell (0, 0) starts in that corner.
+    def __init__(self, rect, tile_size=TILE_SIZE):
+        self.rect = pygame.Rect(rect)
+        self.tile_size = tile_size
+        self.origin_x = 0
+        self.origin_y = 0
+
+    @property
+    def key(self):
+        # Changes whenever anything drawn through the viewport moves
+        return self.tile_size, self.origin_x, self.origin_y
+
+    @property
+    def font_size(self):
+        return round(FONT_SIZE * self.tile_size / TILE_SIZE)
+
+    def cell_at(self, x, y):
+        if not self.rect.collidepoint(x, y):
+            return None
+        return ((y - self.rect.y + self.origin_y) // self.tile_size,
+                (x - self.rect.x + self.origin_x) // self.tile_size)
+
+    def cell_to_screen(self, row, col):
+        return (self.rect.x + col * self.tile_size - self.origin_x,
+                self.rect.y + row * self.tile_size - self.origin_y)
+
+    def visible_cells(self):
+        # (top, left, bottom, right) in cells, exclusive at the end
+        size = self.tile_size
+        top = self.origin_y // size
+        left = self.origin_x // size
+        bottom = -(-(self.origin_y + self.rect.height) // size)
+        right = -(-(self.origin_x + self.rect.width) // size)
+        return top, left, bottom, right
+
+    def pan(self, dx, dy):
+        self.origin_x -= dx
+        self.origin_y -= dy
+
+    def zoom(self, steps, pos=None):
+        # Step through ZOOM_LEVELS keeping the board point under pos fixed
+        if self.tile_size in ZOOM_LEVELS:
+            level = ZOOM_LEVELS.index(self.tile_size)
+        else:
+            level = ZOOM_LEVELS.index(TILE_SIZE)
+        level = max(0, min(len(ZOOM_LEVELS) - 1, level + steps))
+        new_size = ZOOM_LEVELS[level]
+        if new_size == self.tile_size:
+            return False
+        x, y = pos if pos is not None else self.rect.center
+        anchor_x = x - self.rect.x + self.origin_x
+        anchor_y = y - self.rect.y + self.origin_y
+        self.origin_x = anchor_x * new_size // self.tile_size - (x - self.rect.x)
+        self.origin_y = anchor_y * new_size // self.tile_size - (y - self.rect.y)
+        self.tile_size = new_size
+        return True
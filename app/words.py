@@ -0,0 +1,48 @@
+import os
+
+from constants import WORD_LIST_PATH, MIN_WORD_LENGTH
+from dawg import Dawg
+from util import setting_path
+
+
+class WordIndex:
+    def __init__(self, words):
+        self.words = {word.strip().upper() for word in words}
+        self.words.discard("")
+
+    def __contains__(self, word):
+        return word in self.words
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self):
+        return iter(self.words)
+
+
+def word_list_path(path=None):
+    return setting_path(path, "BANANA_WORDS", WORD_LIST_PATH)
+
+
+def compiled_path(path):
+    # Where `python dawg.py <list>` writes the compiled form of a word list
+    return os.path.splitext(path)[0] + ".dawg"
+
+
+def read_word_list(path):
+    with open(path, encoding="utf-8") as f:
+        return [word.upper() for word in (line.strip() for line in f)
+                if len(word) >= MIN_WORD_LENGTH and word.isalpha()]
+
+
+def load_words(path=None):
+    # Prefers a compiled .dawg next to the list when it is at least as new;
+    # returns None when there is no word list, which switches word checking off
+    path = word_list_path(path)
+    compiled = path if path.endswith(".dawg") else compiled_path(path)
+    if os.path.exists(compiled) and (not os.path.exists(path) or
+                                     os.path.getmtime(compiled) >= os.path.getmtime(path)):
+        return Dawg.load(compiled)
+    if not os.path.exists(path):
+        return None
+    return WordIndex(read_word_list(path))
@@ -0,0 +1,26 @@
+import random
+import re
+
+from dawg import Dawg, WILDCARD, compile_words
+
+
+def random_words(rng, count):
+    return {"".join(rng.choice("ABCDE") for _ in range(rng.randrange(1, 8))) for _ in range(count)}
+
+
+def test_dawg_matches_a_set(tmp_path):
+    rng = random.Random(4)
+    words = random_words(rng, 3000)
+    path = tmp_path / "words.dawg"
+    compile_words(sorted(words), str(path))
+    dawg = Dawg.load(str(path))
+
+    assert len(dawg) == len(words)
+    assert list(dawg) == sorted(words)
+    for word in words | random_words(rng, 3000):
+        assert (word in dawg) == (word in words)
+    for _ in range(200):
+        pattern = "".join(rng.choice("ABCDE" + WILDCARD * 3) for _ in range(rng.randrange(1, 8)))
+        regex = re.compile(pattern.replace(WILDCARD, "."))
+        assert dawg.match(pattern) == sorted(word for word in words if regex.fullmatch(word))
+    assert dawg.match("") == []
@@ -0,0 +1,69 @@
+import random
+from collections import Counter
+
+from engine import Board, Game, TilePool
+
+
+def test_pool_find_matches_a_linear_scan():
+    pool = TilePool({"A": 3, "B": 0, "C": 1, "D": 5, "E": 2}, random.Random(1))
+    for _ in range(4):
+        expected = [i for i, count in enumerate(pool.counts) for _ in range(count)]
+        assert [pool.find(k) for k in range(len(pool))] == expected
+        pool.draw_tile()
+
+
+def test_pool_draws_every_tile_once():
+    distribution = {"A": 9, "B": 2, "Q": 1, "Z": 1, "E": 12}
+    pool = TilePool(distribution, random.Random(7), sets=2)
+    drawn = [pool.draw_tile() for _ in range(len(pool))]
+    assert Counter(drawn) == {letter: count * 2 for letter, count in distribution.items()}
+    assert pool.draw_tile() is None
+
+
+def test_pool_draws_in_proportion_to_counts():
+    rng = random.Random(3)
+    draws = Counter(TilePool({"A": 1, "B": 3}, rng).draw_tile() for _ in range(20000))
+    assert abs(draws["B"] / 20000 - 0.75) < 0.02
+
+
+def test_board_snapshot_survives_later_writes():
+    rng = random.Random(5)
+    board = Board()
+    for _ in range(60):
+        board.place(rng.randrange(-20, 40), rng.randrange(-20, 40), rng.choice("ABC"))
+    before = {cell: board.get(*cell) for cell in board.occupied_cells()}
+    snapshot = board.snapshot()
+    for _ in range(200):
+        row, col = rng.randrange(-20, 40), rng.randrange(-20, 40)
+        if board.get(row, col) is None:
+            board.place(row, col, "Z")
+        else:
+            board.remove(row, col)
+    board.restore(snapshot)
+    assert {cell: board.get(*cell) for cell in board.occupied_cells()} == before
+    assert len(board) == len(before)
+
+
+def test_board_restore_reports_changed_cells():
+    board = Board()
+    board.place(1, 1, "A")
+    snapshot = board.snapshot()
+    board.place(1, 2, "B")
+    board.place(40, 40, "C")
+    changed = []
+    board.listeners.append(lambda row, col: changed.append((row, col)))
+    board.restore(snapshot)
+    assert sorted(changed) == [(1, 2), (40, 40)]
+
+
+def test_game_undo_returns_to_the_snapshot():
+    game = Game(11)
+    start = game.snapshot()
+    game.play(0, 5, 5)
+    game.play(0, 5, 6)
+    game.move(5, 6, 6, 5)
+    assert game.board.occupied_cells() == [(5, 5), (6, 5)]
+    while game.undo():
+        pass
+    assert game.board.occupied_cells() == []
+    assert tuple(game.rack.letters) == start.rack
@@ -0,0 +1,19 @@
+import pytest
+
+from engine import Board
+from solver import Solver
+
+# (words, tiles already on the board, rack, tiles the solver should place)
+REGRESSIONS = [
+    # crossing a board letter the rack has no copy of
+    (["CAT", "AT", "TA"], [(5, 5, "A")], "CT", 2),
+]
+
+
+@pytest.mark.parametrize("words, tiles, rack, expected", REGRESSIONS)
+def test_solver_regressions(words, tiles, rack, expected):
+    board = Board()
+    for row, col, letter in tiles:
+        board.place(row, col, letter)
+    solution = Solver(set(words)).solve(board, list(rack))
+    assert len(solution) == expected, solution.placements
@@ -0,0 +1,41 @@
+import random
+
+from engine import Board
+from validator import WordValidator, ACROSS, DOWN
+
+WORDS = {"AB", "BA", "ABA", "BAB", "AA", "ABBA"}
+
+
+def invalid_cells(board, words):
+    # Every run of two or more tiles, read from scratch
+    invalid = set()
+    occupied = set(board.cells())
+    for direction in (ACROSS, DOWN):
+        dr, dc = direction
+        for row, col in occupied:
+            if (row - dr, col - dc) in occupied:
+                continue
+            cells = [(row, col)]
+            while (cells[-1][0] + dr, cells[-1][1] + dc) in occupied:
+                cells.append((cells[-1][0] + dr, cells[-1][1] + dc))
+            if len(cells) > 1 and "".join(board.get(*cell) for cell in cells) not in words:
+                invalid.update(cells)
+    return invalid
+
+
+def test_incremental_checks_match_a_full_check():
+    rng = random.Random(2)
+    board = Board()
+    validator = WordValidator(board, WORDS)
+    for step in range(2000):
+        row, col = rng.randrange(8), rng.randrange(8)
+        if board.get(row, col) is None:
+            board.place(row, col, rng.choice("AB"))
+        else:
+            board.remove(row, col)
+        # undo and redo restore whole snapshots, reporting only the cells that differ
+        if step % 50 == 0:
+            saved = board.snapshot()
+        elif step % 50 == 25:
+            board.restore(saved)
+        assert set(validator.invalid_cells) == invalid_cells(board, WORDS)